@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+
+from object_tool import (
+    CustomObjectToolAdminSite, CustomObjectToolModelAdminMixin)
+
+
+def make_tool(name, permission=None):
+    def tool(modeladmin, request, obj=None):
+        pass
+    tool.__name__ = str(name)
+    tool.short_description = name.replace("_", " ")
+    if permission:
+        tool.allowed_permissions = (permission, )
+    return tool
+
+
+def make_modeladmin(tools=0, depth=1, permissions=0):
+    """
+    A model admin with `tools` object tools, `permissions` of them are
+    permission gated by their own `has_<permission>_permission`, the mixin
+    is `depth` classes deep
+    """
+    attrs = OrderedDict()
+    names = []
+    for i in range(tools):
+        name = "tool_%d" % i
+        permission = "tool%d" % i if i < permissions else None
+        attrs[name] = make_tool(name, permission)
+        names.append(name)
+        if permission:
+            attrs["has_%s_permission" % permission] = \
+                lambda self, request: request.user.has_perm("auth.change_user")
+    attrs["object_tools"] = names
+
+    bases = (CustomObjectToolModelAdminMixin, admin.ModelAdmin)
+    for i in range(depth - 1):
+        bases = (type(str("Level%dAdmin" % i), bases, dict()), )
+    return type(str("BenchmarkUserAdmin"), bases, attrs)
+
+
+def make_site(name, modeladmin=admin.ModelAdmin, site_class=CustomObjectToolAdminSite, site_tools=0):
+    site = site_class(name=name)
+    for i in range(site_tools):
+        site.add_object_tool(make_tool("site_tool_%d" % i))
+    site.register(User, modeladmin)
+    return site
+
+
+VARIANTS = OrderedDict((
+    ("plain", dict(site_class=admin.AdminSite)),
+    ("tools_0", dict(modeladmin=make_modeladmin(0))),
+    ("tools_5", dict(modeladmin=make_modeladmin(5))),
+    ("tools_20", dict(modeladmin=make_modeladmin(20))),
+    ("tools_50", dict(modeladmin=make_modeladmin(50))),
+    ("depth_5", dict(modeladmin=make_modeladmin(5, depth=5))),
+    ("depth_20", dict(modeladmin=make_modeladmin(5, depth=20))),
+    ("site_tools_5", dict(modeladmin=make_modeladmin(0), site_tools=5)),
+    ("site_tools_20", dict(modeladmin=make_modeladmin(0), site_tools=20)),
+    ("permissions_5", dict(modeladmin=make_modeladmin(20, permissions=5))),
+    ("permissions_20", dict(
+        modeladmin=make_modeladmin(20, permissions=20))),
+))
+"""variant name: arguments of `make_site`"""
+
+sites = OrderedDict(
+    (name, make_site(name, **kwargs)) for name, kwargs in VARIANTS.items())
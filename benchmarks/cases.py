@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import Client
+
+from .admin import sites
+
+
+def setup():
+    """create the database and users, returns a superuser client and a
+    staff client whose permissions are checked one by one"""
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    superuser = User.objects.create_superuser(
+        "admin", "admin@example.com", "password")
+    staff = User.objects.create_user("staff", is_staff=True)
+    staff.user_permissions.set(Permission.objects.filter(
+        content_type__app_label="auth", codename__endswith="_user"))
+    for i in range(20):
+        User.objects.create_user("user%d" % i)
+
+    superuser_client = Client()
+    superuser_client.force_login(superuser)
+    staff_client = Client()
+    staff_client.force_login(staff)
+    return superuser, superuser_client, staff_client
+
+
+def get_cases():
+    """returns an ordered dict of case name: a callable runs the case once"""
+    superuser, client, staff_client = setup()
+    pk = superuser.pk
+    cases = OrderedDict()
+
+    def get(client, url):
+        def run():
+            resp = client.get(url)
+            assert resp.status_code == 200, (url, resp.status_code)
+        return run
+
+    def post(client, url):
+        def run():
+            resp = client.post(url)
+            assert resp.status_code == 302, (url, resp.status_code)
+        return run
+
+    for name in sites:
+        user_client = staff_client if name.startswith("permissions")\
+            else client
+        cases["changelist.%s" % name] = get(
+            user_client, "/%s/auth/user/" % name)
+        cases["change.%s" % name] = get(
+            user_client, "/%s/auth/user/%s/change/" % (name, pk))
+
+    for name in ("tools_5", "tools_50", "permissions_20"):
+        user_client = staff_client if name.startswith("permissions")\
+            else client
+        cases["dispatch.changelist.%s" % name] = post(
+            user_client, "/%s/auth/user/objecttool/tool_0/" % name)
+        cases["dispatch.change.%s" % name] = post(
+            user_client, "/%s/auth/user/%s/objecttool/tool_0/" % (name, pk))
+    for name in ("site_tools_5", "site_tools_20"):
+        cases["dispatch.changelist.%s" % name] = post(
+            client, "/%s/auth/user/objecttool/site_tool_0/" % name)
+    return cases
@@ -0,0 +1,72 @@
+"""
+Measure the import time of object_tool by `python -X importtime`
+
+    python benchmarks/importtime.py [-r 10] [-o importtime.json]
+
+The time of each statement excludes the interpreter startup, measured by
+running `pass` the same way.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+STATEMENTS = (
+    ("import", "import object_tool"),
+    ("import_admin", "import object_tool; object_tool.CustomObjectToolModelAdminMixin"),
+    ("import_shortcuts", "import object_tool; object_tool.link"),
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def importtime(statement):
+    """returns the total microseconds and number of modules imported"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env, stderr=subprocess.PIPE, check=True,
+        universal_newlines=True).stderr
+    total = modules = 0
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules += 1
+        # nested imports are indented, count top level imports only
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("-r", "--repeat", type=int, default=10)
+    parser.add_argument("-o", "--output", help="write the results as json")
+    args = parser.parse_args()
+
+    startup = statistics.median(
+        importtime("pass")[0] for _ in range(args.repeat))
+    results = {}
+    for name, statement in STATEMENTS:
+        runs = [importtime(statement) for _ in range(args.repeat)]
+        results[name] = dict(
+            statement=statement,
+            median_us=statistics.median(run[0] for run in runs) - startup,
+            modules=runs[-1][1])
+        sys.stderr.write("%-20s %10.0f us %5d modules\n" % (
+            name, results[name]["median_us"], results[name]["modules"]))
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
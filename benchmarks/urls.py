@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.urls import re_path as url
+
+from .admin import sites
+
+urlpatterns = [
+    url(r'^%s/' % name, site.urls) for name, site in sites.items()
+]
@@ -17,14 +17,45 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
-from .admin import CustomObjectToolModelAdmin, CustomObjectToolModelAdminMixin
-from .apps import ObjectToolConfig
-from .shortcuts import confirm, form, link
-from .sites import (
-    CustomObjectToolAdminSite, CustomObjectToolAdminSiteMixin, patch_admin)
-
-# shortnames
-ObjectToolModelAdmin = CustomObjectToolModelAdmin
-ObjectToolModelAdminMixin = CustomObjectToolModelAdminMixin
-ObjectToolAdminSite = CustomObjectToolAdminSite
-ObjectToolAdminSiteMixin = CustomObjectToolAdminSiteMixin
+from importlib import import_module
+
+# public names are imported lazily on first access, so importing the package
+# doesn't import django admin until they are needed
+_lazy_attributes = {
+    "CustomObjectToolModelAdmin": ("admin", "CustomObjectToolModelAdmin"),
+    "CustomObjectToolModelAdminMixin": (
+        "admin", "CustomObjectToolModelAdminMixin"),
+    "ObjectToolConfig": ("apps", "ObjectToolConfig"),
+    "background": ("shortcuts", "background"),
+    "batch": ("shortcuts", "batch"),
+    "confirm": ("shortcuts", "confirm"),
+    "export": ("shortcuts", "export"),
+    "form": ("shortcuts", "form"),
+    "link": ("shortcuts", "link"),
+    "CustomObjectToolAdminSite": ("sites", "CustomObjectToolAdminSite"),
+    "CustomObjectToolAdminSiteMixin": (
+        "sites", "CustomObjectToolAdminSiteMixin"),
+    "patch_admin": ("sites", "patch_admin"),
+    # shortnames
+    "ObjectToolModelAdmin": ("admin", "CustomObjectToolModelAdmin"),
+    "ObjectToolModelAdminMixin": ("admin", "CustomObjectToolModelAdminMixin"),
+    "ObjectToolAdminSite": ("sites", "CustomObjectToolAdminSite"),
+    "ObjectToolAdminSiteMixin": ("sites", "CustomObjectToolAdminSiteMixin"),
+}
+
+__all__ = tuple(_lazy_attributes)
+
+
+def __getattr__(name):
+    try:
+        module, attr = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError(
+            "module %r has no attribute %r" % (__name__, name))
+    value = getattr(import_module("." + module, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
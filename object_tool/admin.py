@@ -1,25 +1,65 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import asyncio
 from collections import OrderedDict
-from functools import update_wrapper
-import re
+from collections.abc import Mapping
+from contextlib import ExitStack, nullcontext
+import copy
+from functools import partial, update_wrapper
+from itertools import chain
 
+from asgiref.sync import async_to_sync, sync_to_async
 from django.urls import re_path as url
+from django.contrib import messages
 from django.contrib.admin import ModelAdmin
 from django.contrib.admin.options import csrf_protect_m
 from django.contrib.admin.templatetags.admin_urls import add_preserved_filters
-from django.contrib.admin.utils import unquote
-from django.http import response
-from django.template.response import SimpleTemplateResponse
-from django.urls import NoReverseMatch, resolve, reverse
+from django.contrib.admin.utils import quote, unquote
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.forms.widgets import MediaDefiningClass
+from django.http import Http404, QueryDict, response
+from django.middleware.csrf import CsrfViewMiddleware
+from django.template.response import SimpleTemplateResponse, TemplateResponse
+from django.urls import resolve, reverse
+from django.utils.cache import add_never_cache_headers
 from django.utils.text import capfirst
-from six.moves.urllib.parse import parse_qsl, urlparse
-
+from django.utils.translation import gettext as _, ngettext
+import six
+from six.moves.urllib.parse import parse_qsl
+
+from .budgets import tool_query_budget
+from .jobs import Job
+from .locks import ToolLock
+from .metrics import measure
+from .profiling import Profile
+from .results import connect_invalidation, get_dependencies, ResultCache
 from .sites import CustomObjectToolAdminSiteMixin
-from .utils import object_tool_context
+from .throttling import Throttle
+from .utils import (
+    cached_reverse, get_tool_spec, request_cache, ToolSpec)
+
+
+class _ObjectToolModelAdminMetaclass(MediaDefiningClass):
+    """
+    Count assignments to attributes of model admin classes, such as
+    `object_tools`, so the compiled tools are rebuilt after them without
+    inspecting the classes on every request
+    """
+
+    version = 0
+
+    def __setattr__(cls, name, value):
+        super(_ObjectToolModelAdminMetaclass, cls).__setattr__(name, value)
+        _ObjectToolModelAdminMetaclass.version += 1
+
+    def __delattr__(cls, name):
+        super(_ObjectToolModelAdminMetaclass, cls).__delattr__(name)
+        _ObjectToolModelAdminMetaclass.version += 1
 
 
+@six.add_metaclass(_ObjectToolModelAdminMetaclass)
 class CustomObjectToolModelAdminMixin(object):
     """
     If you want to use custom object tool in your modeladmin,
@@ -35,6 +75,27 @@ class CustomObjectToolModelAdminMixin(object):
     change_object_tools = []
     """object tools only for change view"""
 
+    object_tool_async = False
+    """serve object tools by an async view, for ASGI deployments"""
+
+    objecttool_unrestricted_fetch = False
+    """
+    fetch objects of tools with `fetch` hints from the default manager
+    rather than `get_queryset`, only if every user may act on every object
+    """
+
+    objecttool_lean_context = True
+    """
+    render pages of object tools with a lean context rather than the full
+    `each_context` of the admin site, the nav sidebar is not shown
+    """
+
+    object_tool_query_budgets = None
+    """
+    max queries of the changelist, change, add and objecttool views,
+    enforced by `object_tool.middleware.QueryBudgetMiddleware`
+    """
+
     @property
     def _base_change_list_template(self):
         """parent change list template"""
@@ -53,6 +114,19 @@ class CustomObjectToolModelAdminMixin(object):
 
     change_form_template = "admin/object_tool/baseview.html"
 
+    def __init__(self, *args, **kwargs):
+        super(CustomObjectToolModelAdminMixin, self).__init__(*args, **kwargs)
+        # invalidate cached results of tools in every process, even ones
+        # never executed the tools
+        for name in chain(
+                self.object_tools, self.changelist_object_tools,
+                self.change_object_tools):
+            func = name if callable(name) else\
+                getattr(self.__class__, name, None)
+            if getattr(func, "cache_result", None):
+                for model in get_dependencies(self, func):
+                    connect_invalidation(model)
+
     def get_urls(self):
         urlpatterns = super(CustomObjectToolModelAdminMixin, self).get_urls()
 
@@ -62,49 +136,87 @@ class CustomObjectToolModelAdminMixin(object):
             wrapper.model_admin = self
             return update_wrapper(wrapper, view)
 
+        if self.object_tool_async:
+            object_tool_view = self._async_admin_view(self.aobject_tool_view)
+        else:
+            object_tool_view = wrap(self.object_tool_view)
+
         info = self.model._meta.app_label, self.model._meta.model_name
         urlpatterns = [
+            url(
+                r"^objecttool/jobs/(?P<job_id>[0-9a-f]+)/$",
+                wrap(self.object_tool_job_view),
+                name="%s_%s_objecttooljob" % info
+            ),
             url(
                 r"^(?:(?P<object_id>.+)/)?objecttool/(?P<action_name>.+)/$",
-                wrap(self.object_tool_view),
+                object_tool_view,
                 name="%s_%s_objecttool" % info
             )
         ] + urlpatterns
         return urlpatterns
 
+    def _async_admin_view(self, view):
+        """
+        The async counterpart of `AdminSite.admin_view`, site permission
+        and csrf checks run in a thread before awaiting the view
+        """
+        admin_site = self.admin_site
+        csrf_middleware = CsrfViewMiddleware(lambda request: None)
+
+        def check(request):
+            if not admin_site.has_permission(request):
+                # Inner import to prevent django.contrib.admin (app) from
+                # importing django.contrib.auth.models.User
+                from django.contrib.auth.views import redirect_to_login
+                return redirect_to_login(
+                    request.get_full_path(),
+                    reverse("admin:login", current_app=admin_site.name))
+            return csrf_middleware.process_view(request, view, (), {})
+
+        async def wrapper(request, *args, **kwargs):
+            rv = await sync_to_async(check)(request)
+            if rv is None:
+                rv = await view(request, *args, **kwargs)
+            if hasattr(rv, "render") and callable(rv.render):
+                rv.add_post_render_callback(
+                    lambda r: csrf_middleware.process_response(request, r))
+            else:
+                rv = csrf_middleware.process_response(request, rv)
+            add_never_cache_headers(rv)
+            return rv
+
+        wrapper.model_admin = self
+        return update_wrapper(wrapper, view)
+
     def _get_view_name(self, request):
-        """get request url name, returns 'changelist' or 'change'"""
-        pattern = "_([^_]+?)$"
-        url_name = resolve(request.path_info).url_name
-        match = re.search(pattern, url_name)
-        view = match.group(1)
+        """
+        get request url name, returns 'changelist' or 'change', prefer
+        passing the view explicitly rather than calling this method
+        """
+        match = request.resolver_match or resolve(request.path_info)
+        view = match.url_name.rsplit("_", 1)[-1]
         if view == "objecttool":
-            referrer = self._get_post_objecttool_url(request)
-            url_name = resolve(urlparse(referrer).path).url_name
-            match = re.search(pattern, url_name)
-            view = match.group(1)
+            view = self._get_object_tool_origin(match.kwargs.get("object_id"))
         return view
 
-    def _get_post_objecttool_url(self, request):
+    def _get_object_tool_origin(self, object_id=None):
+        """get the view an object tool was executed from"""
+        return "change" if object_id else "changelist"
+
+    def _get_post_objecttool_url(self, request, object_id=None):
         """get redirect url after complete objecttool action"""
         rv = request.META.get("HTTP_REFERRER")
         if not rv:
             opts = self.model._meta
-            obj_id = resolve(request.path).kwargs.get("object_id")
-            if obj_id:
-                url_name = "admin:%s_%s_change" % (
-                    opts.app_label, opts.model_name)
-                try:
-                    post_url = reverse(
-                        url_name, current_app=self.admin_site.name,
-                        kwargs=dict(object_id=obj_id))
-                except NoReverseMatch:
-                    post_url = reverse(
-                        url_name, current_app=self.admin_site.name,
-                        args=(obj_id,))
+            if object_id:
+                post_url = cached_reverse(
+                    "admin:%s_%s_change" % (opts.app_label, opts.model_name),
+                    current_app=self.admin_site.name, object_id=object_id)
             else:
-                post_url = reverse("admin:%s_%s_changelist" %
-                    (opts.app_label, opts.model_name),
+                post_url = cached_reverse(
+                    "admin:%s_%s_changelist" % (
+                        opts.app_label, opts.model_name),
                     current_app=self.admin_site.name)
             preserved_filters = self.get_preserved_filters(request)
             rv = add_preserved_filters(
@@ -112,11 +224,42 @@ class CustomObjectToolModelAdminMixin(object):
             )
         return rv
 
-    def _get_base_object_tools(self, request):
+    def _get_base_object_tools(self, request, view=None):
         """return the list of object tools"""
-        object_tools = []
+        view = view or self._get_view_name(request)
+        object_tools = self._get_compiled_object_tools(view)
+        return self._filter_object_tools_by_permissions(request, object_tools)
+
+    def _get_compiled_object_tools(self, view):
+        """
+        return the object tools of a view before filtered by permissions,
+        the list is compiled at first use and rebuilt when the class, an
+        attribute of a model admin class or the admin site's tool registry
+        change
+        """
+        return self._get_object_tool_registry(view)[0]
+
+    def _get_object_tool_specs(self, view):
+        """return a mapping of name to ToolSpec of the tools of a view"""
+        return self._get_object_tool_registry(view)[1]
+
+    def _get_object_tool_registry(self, view):
+        signature = (
+            self.__class__,
+            getattr(self.admin_site, "object_tool_version", None),
+            _ObjectToolModelAdminMetaclass.version)
+        registry = self.__dict__.get("_object_tool_registry")
+        if registry is None or registry[0] != signature:
+            registry = self._object_tool_registry = (signature, {})
+        try:
+            return registry[1][view]
+        except KeyError:
+            rv = registry[1][view] = self._compile_object_tools(view)
+            return rv
 
-        view = self._get_view_name(request)
+    def _compile_object_tools(self, view):
+        object_tools = []
+        specs = {}
 
         # Gather object tools from the admin site first
         if isinstance(self.admin_site, CustomObjectToolAdminSiteMixin):
@@ -124,15 +267,18 @@ class CustomObjectToolModelAdminMixin(object):
                 description = getattr(
                     func, "short_description", name.replace("_", " "))
                 object_tools.append((func, name, description))
+                specs[name] = get_tool_spec(func, name, description)
 
         # Then gather them from the model admin and all parent classes
         for klass in self.__class__.mro()[::-1]:
             class_tools = list(getattr(klass, "object_tools", None) or [])
             class_tools.extend(getattr(
                 klass, "{view}_object_tools".format(view=view), None) or [])
-            object_tools.extend(map(self.get_object_tool, class_tools))
+            for tool in map(self.get_object_tool, class_tools):
+                object_tools.append(tool)
+                specs[tool[1]] = get_tool_spec(*tool)
 
-        return self._filter_object_tools_by_permissions(request, object_tools)
+        return tuple(object_tools), specs
 
     def _filter_object_tools_by_permissions(self, request, object_tools):
         """Filter out any object tools that the user doesn't have access to"""
@@ -142,28 +288,48 @@ class CustomObjectToolModelAdminMixin(object):
             if not hasattr(callable, "allowed_permissions"):
                 filtered_object_tools.append(tool)
                 continue
-            permission_checks = (
-                getattr(self, "has_%s_permission" % permission)
-                for permission in callable.allowed_permissions
-            )
             any(
-                has_permission(request)
-                for has_permission in permission_checks
+                self._has_object_tool_permission(request, permission)
+                for permission in callable.allowed_permissions
             ) and filtered_object_tools.append(tool)
         return filtered_object_tools
 
-    def get_object_tools(self, request):
+    def _has_object_tool_permission(self, request, permission):
+        """
+        check `has_<permission>_permission`, the result is memoized on the
+        request so every permission is only checked once per request
+        """
+        key = (self, permission)
+        cache = request_cache(request, "permissions")
+        try:
+            return cache[key]
+        except KeyError:
+            has_permission = getattr(self, "has_%s_permission" % permission)
+            rv = cache[key] = has_permission(request)
+            return rv
+
+    def get_object_tools(self, request, view=None):
         """
         Return a dictionary mapping the names of all object tools for this
         ModelAdmin to a tuple of (callable, name, description) for each object
-        tool.
+        tool. The result is memoized for the lifetime of the request.
+
+        `view` is 'changelist' or 'change', it is resolved from the request
+        when omitted.
         """
-        tools = self._get_base_object_tools(request)
-        # Convert the object_tools into an OrderedDict keyed by name.
-        return OrderedDict(
-            (name, (func, name, desc))
-            for func, name, desc in tools
-        )
+        view = view or self._get_view_name(request)
+        key = (self, view)
+        cache = request_cache(request, "object_tools")
+        try:
+            return cache[key]
+        except KeyError:
+            tools = self._get_base_object_tools(request, view)
+            # Convert the object_tools into an OrderedDict keyed by name.
+            rv = cache[key] = OrderedDict(
+                (name, (func, name, desc))
+                for func, name, desc in tools
+            )
+            return rv
 
     def get_object_tool(self, object_tool):
         """
@@ -199,9 +365,160 @@ class CustomObjectToolModelAdminMixin(object):
             description = capfirst(object_tool.replace("_", " "))
         return func, object_tool, description
 
-    def response_object_tool(self, request, action, obj=None, extra_context=None):
-        """Handle an admin object tool"""
-        rv = action(self, request, obj)
+    def response_object_tool(self, request, action, obj=None, extra_context=None, name=None):
+        """
+        Handle an admin object tool, `name` is the name the tool is
+        dispatched under, the name of its function by default
+        """
+        results = ResultCache.for_tool(self, request, action, obj, name)
+        if results is None:
+            return self._response_object_tool(
+                request, action, obj, extra_context, name)
+        rv = results.get()
+        if rv is None:
+            rv = results.set(self._response_object_tool(
+                request, action, obj, extra_context, name))
+        return rv
+
+    async def aresponse_object_tool(self, request, action, obj=None, extra_context=None, name=None):
+        """Handle an admin object tool asynchronously"""
+        results = await sync_to_async(ResultCache.for_tool)(
+            self, request, action, obj, name)
+        if results is None:
+            return await self._aresponse_object_tool(
+                request, action, obj, extra_context, name)
+        rv = await sync_to_async(results.get)()
+        if rv is None:
+            rv = await sync_to_async(results.set)(
+                await self._aresponse_object_tool(
+                    request, action, obj, extra_context, name))
+        return rv
+
+    def _response_object_tool(self, request, action, obj=None, extra_context=None, name=None):
+        execute = partial(
+            self._execute_object_tool, request, action, obj, extra_context,
+            name)
+        lock = ToolLock.for_tool(self, action, obj, name)
+        if lock is None:
+            return execute()
+        return lock.run(execute, partial(
+            self.response_object_tool_locked, request, action, obj,
+            name=name))
+
+    async def _aresponse_object_tool(self, request, action, obj=None, extra_context=None, name=None):
+        execute = partial(
+            self._aexecute_object_tool, request, action, obj, extra_context,
+            name)
+        lock = ToolLock.for_tool(self, action, obj, name)
+        if lock is None:
+            return await execute()
+        return await lock.arun(execute, partial(
+            self.response_object_tool_locked, request, action, obj,
+            name=name))
+
+    def _execute_object_tool(self, request, action, obj=None, extra_context=None, name=None):
+        with measure(self, request, action, obj, name) as measurement, \
+                tool_query_budget(request, action, name):
+            if asyncio.iscoroutinefunction(action):
+                rv = async_to_sync(action)(self, request, obj)
+            else:
+                rv = action(self, request, obj)
+            return measurement.finish(self._get_object_tool_response(
+                request, rv, obj, extra_context))
+
+    async def _aexecute_object_tool(self, request, action, obj=None, extra_context=None, name=None):
+        # query wrappers are installed on the connections of a thread, enter
+        # them in the thread sync_to_async runs the queries in
+        measurement = measure(self, request, action, obj, name)
+        stack = await sync_to_async(self._enter_object_tool_contexts)(
+            request, action, measurement, name)
+        try:
+            if asyncio.iscoroutinefunction(action):
+                rv = await action(self, request, obj)
+            else:
+                rv = await sync_to_async(action)(self, request, obj)
+            rv = measurement.finish(self._get_object_tool_response(
+                request, rv, obj, extra_context))
+        except BaseException as e:
+            await sync_to_async(stack.__exit__)(type(e), e, e.__traceback__)
+            raise
+        await sync_to_async(stack.close)()
+        return rv
+
+    def _enter_object_tool_contexts(self, request, action, measurement,
+                                    name=None):
+        with ExitStack() as stack:
+            stack.enter_context(measurement)
+            stack.enter_context(tool_query_budget(request, action, name))
+            return stack.pop_all()
+
+    def _throttle_object_tool(self, request, action, name=None):
+        """
+        Count an execution of a throttled tool, returns the seconds to wait
+        if it's throttled. Showing the confirm page of a tool is checked but
+        not counted.
+        """
+        throttle = Throttle.for_tool(self, request, action, name)
+        if throttle is None:
+            return None
+        confirm_field = getattr(action, "confirm_field", None)
+        if confirm_field and not request.POST.get(confirm_field):
+            return throttle.wait()
+        return throttle.consume()
+
+    def response_object_tool_throttled(self, request, action, object_id, wait, name=None):
+        """The 429 response of a throttled tool"""
+        spec = ToolSpec.from_tool(action, name)
+        messages.warning(request, ngettext(
+            "%(tool)s is throttled, please try again in %(wait)d second.",
+            "%(tool)s is throttled, please try again in %(wait)d seconds.",
+            wait) % dict(tool=spec.short_description, wait=wait))
+        context = dict(
+            self.get_object_tool_context(request),
+            opts=self.model._meta,
+            object_id=object_id,
+            object_tool=spec,
+            title=spec.short_description,
+            retry_after=wait,
+            back_url=self._get_post_objecttool_url(request, object_id)
+        )
+        request.current_app = self.admin_site.name
+        rv = TemplateResponse(
+            request, "admin/object_tool/throttled.html", context, status=429)
+        rv["Retry-After"] = str(wait)
+        return rv
+
+    def response_object_tool_locked(self, request, action, obj=None, coalesced=False, name=None):
+        """
+        The response of an execution of a locked tool which is rejected, or
+        coalesced into another execution without a response to share
+        """
+        spec = ToolSpec.from_tool(action, name)
+        if coalesced:
+            messages.info(request, _(
+                "%(tool)s was completed by another request.") % dict(
+                    tool=spec.short_description))
+        else:
+            messages.warning(request, _(
+                "%(tool)s is running, please try again later.") % dict(
+                    tool=spec.short_description))
+        return response.HttpResponseRedirect(self._get_post_objecttool_url(
+            request, obj and quote(obj.pk)))
+
+    def response_object_tool_incorrect_lookup(self, request):
+        """
+        The response of a tool which failed to build its queryset from the
+        preserved changelist filters, redirects to the unfiltered changelist
+        """
+        messages.error(request, _(
+            "The changelist filters of the tool are invalid."))
+        opts = self.model._meta
+        return response.HttpResponseRedirect(cached_reverse(
+            "admin:%s_%s_changelist" % (opts.app_label, opts.model_name),
+            current_app=self.admin_site.name))
+
+    def _get_object_tool_response(self, request, rv, obj=None, extra_context=None):
+        """turn the return value of an object tool into a response"""
         if isinstance(rv, SimpleTemplateResponse):
             rv.context_data = rv.context_data or dict()
             extra_context and rv.context_data.update(extra_context)
@@ -209,25 +526,278 @@ class CustomObjectToolModelAdminMixin(object):
         elif isinstance(rv, response.HttpResponseBase):
             return rv
         else:
-            redirect_url = self._get_post_objecttool_url(request)
+            redirect_url = self._get_post_objecttool_url(
+                request, obj and quote(obj.pk))
             return response.HttpResponseRedirect(redirect_url)
 
     @csrf_protect_m
     def object_tool_view(self, request, action_name, object_id=None, extra_context=None):
-        if action_name not in self.get_object_tools(request):
+        view = self._get_object_tool_origin(object_id)
+        object_tools = self.get_object_tools(request, view)
+        if action_name not in object_tools:
+            return response.HttpResponseForbidden()
+
+        action = object_tools[action_name][0]
+        allow_get = getattr(action, "allow_get", False)
+        if not allow_get and request.method != "POST":
+            return response.HttpResponseNotAllowed(["POST"])
+
+        wait = self._throttle_object_tool(request, action, action_name)
+        if wait is not None:
+            return self.response_object_tool_throttled(
+                request, action, object_id, wait, action_name)
+
+        return self._fetch_and_response_object_tool(
+            request, action, object_id, extra_context, action_name)
+
+    async def aobject_tool_view(self, request, action_name, object_id=None, extra_context=None):
+        """
+        The async object tool view, used when `object_tool_async` is set.
+        Async tools are awaited directly while sync ones run in a thread.
+        """
+        view = self._get_object_tool_origin(object_id)
+        object_tools = await self.aget_object_tools(request, view)
+        if action_name not in object_tools:
             return response.HttpResponseForbidden()
 
-        action = self.get_object_tool(action_name)[0]
+        action = object_tools[action_name][0]
         allow_get = getattr(action, "allow_get", False)
         if not allow_get and request.method != "POST":
-            return response.HttpResponseNotAllowed()
+            return response.HttpResponseNotAllowed(["POST"])
+
+        wait = await sync_to_async(self._throttle_object_tool)(
+            request, action, action_name)
+        if wait is not None:
+            return await sync_to_async(self.response_object_tool_throttled)(
+                request, action, object_id, wait, action_name)
+
+        fetch = _get_fetch_hints(action)
+        if fetch and fetch.get("select_for_update"):
+            # the row lock lives in a transaction of a single thread
+            return await sync_to_async(self._fetch_and_response_object_tool)(
+                request, action, object_id, extra_context, action_name)
+
+        profile = Profile.for_request(request, action)
+        with profile or nullcontext():
+            if not object_id:
+                obj = None
+            elif fetch is None:
+                obj = await self.aget_object(request, unquote(object_id))
+            else:
+                obj = await sync_to_async(self.get_object_tool_object)(
+                    request, action, unquote(object_id))
+            rv = await self.aresponse_object_tool(
+                request, action, obj, extra_context, action_name)
+        if profile:
+            return await sync_to_async(self.response_object_tool_profile)(
+                request, action, obj, profile, rv, action_name)
+        return rv
+
+    def _fetch_and_response_object_tool(self, request, action, object_id, extra_context=None, name=None):
+        profile = Profile.for_request(request, action)
+        with profile or nullcontext(), self._object_tool_atomic(action):
+            obj = object_id and self.get_object_tool_object(
+                request, action, unquote(object_id))
+            rv = self.response_object_tool(
+                request, action, obj, extra_context, name)
+        if profile:
+            return self.response_object_tool_profile(
+                request, action, obj, profile, rv, name)
+        return rv
+
+    def response_object_tool_profile(self, request, action, obj, profile, rv, name=None):
+        """
+        The summary page of a profiled object tool execution, returned
+        instead of the response of the tool
+        """
+        opts = self.model._meta
+        spec = ToolSpec.from_tool(action, name)
+        profile.save("%s.%s" % (opts.label_lower, spec.name))
+        context = dict(
+            self.get_object_tool_context(request),
+            opts=opts,
+            obj=obj,
+            object_id=obj and obj.pk,
+            object_tool=spec,
+            title=spec.short_description,
+            profile=profile,
+            stats=profile.summary(),
+            duration=profile.duration * 1000,
+            queries=[dict(query, ms=query["duration"] * 1000)
+                     for query in profile.queries],
+            query_duration=profile.query_duration * 1000,
+            response=rv,
+            response_type=rv.__class__.__name__
+        )
+        request.current_app = self.admin_site.name
+        return TemplateResponse(
+            request, "admin/object_tool/profile.html", context)
+
+    def get_object_tool_object(self, request, action, object_id):
+        """
+        Return the object an object tool executes on, or None if it doesn't
+        exist. By default the object is fetched by `get_object`, a tool can
+        declare a `fetch` attribute to fetch it leaner:
+
+            fetch=False
+                an instance with only its pk loaded, the other fields are
+                deferred, after checking the object exists
+            fetch=True
+                fetch from `get_object_tool_fetch_queryset` by primary key
+            fetch=dict(only=..., select_related=..., prefetch_related=...,
+                       select_for_update=True or its kwargs)
+                fetch from `get_object_tool_fetch_queryset` by primary key,
+                with the hints applied. The tool runs in the transaction
+                holding the row lock when `select_for_update` is set.
+        """
+        fetch = _get_fetch_hints(action)
+        if fetch is None:
+            return self.get_object(request, object_id)
+
+        model = self.model
+        try:
+            pk = model._meta.pk.to_python(object_id)
+        except ValidationError:
+            return None
+        queryset = self.get_object_tool_fetch_queryset(request)
+        if fetch is False:
+            if not queryset.filter(pk=pk).exists():
+                return None
+            return model.from_db(queryset.db, [model._meta.pk.attname], [pk])
+
+        if fetch.get("only"):
+            queryset = queryset.only(*fetch["only"])
+        if fetch.get("select_related"):
+            queryset = queryset.select_related(*fetch["select_related"])
+        if fetch.get("prefetch_related"):
+            queryset = queryset.prefetch_related(*fetch["prefetch_related"])
+        select_for_update = fetch.get("select_for_update")
+        if select_for_update:
+            queryset = queryset.select_for_update(
+                **(select_for_update if isinstance(select_for_update, dict)
+                   else {}))
+        try:
+            return queryset.get(pk=pk)
+        except (model.DoesNotExist, ValidationError, ValueError):
+            return None
+
+    def get_object_tool_context(self, request):
+        """
+        The common context of pages of object tools, such as confirm, form
+        and job pages. Unless `objecttool_lean_context` is turned off, only
+        what the pages use is computed, `available_apps` is left empty
+        instead of iterating the whole registry of the admin site.
+        """
+        site = self.admin_site
+        if not self.objecttool_lean_context:
+            return site.each_context(request)
+        script_name = request.META["SCRIPT_NAME"]
+        site_url = script_name\
+            if site.site_url == "/" and script_name else site.site_url
+        return dict(
+            site_title=site.site_title,
+            site_header=site.site_header,
+            site_url=site_url,
+            has_permission=site.has_permission(request),
+            available_apps=[],
+            is_popup=False,
+            is_nav_sidebar_enabled=False
+        )
+
+    def get_object_tool_fetch_queryset(self, request):
+        """
+        The base queryset objects of tools with `fetch` hints are fetched
+        from. It is `get_queryset` without its `select_related` and
+        `prefetch_related`, so the rows a user may act on stay restricted,
+        or the plain default manager if `objecttool_unrestricted_fetch` is
+        set.
+        """
+        if self.objecttool_unrestricted_fetch:
+            return self.model._default_manager.all()
+        return self.get_queryset(request).select_related(
+            None).prefetch_related(None)
+
+    def _object_tool_atomic(self, action):
+        fetch = _get_fetch_hints(action)
+        if fetch and fetch.get("select_for_update"):
+            return transaction.atomic(using=router.db_for_write(self.model))
+        return nullcontext()
+
+    def get_object_tool_queryset(self, request):
+        """
+        Return the queryset of the changelist an object tool was executed
+        from, the active filters, search and date hierarchy are applied from
+        the preserved changelist filters. The changelist is built at the
+        first call in a request without counting or paginating results.
+        May raise `IncorrectLookupParameters`, which tools may turn into
+        `response_object_tool_incorrect_lookup`.
+        """
+        cache = request_cache(request, "changelist_querysets")
+        try:
+            return cache[self]
+        except KeyError:
+            pass
+
+        changelist_filters = request.GET.get("_changelist_filters")\
+            or request.POST.get("_changelist_filters") or ""
+        changelist_request = copy.copy(request)
+        changelist_request.GET = QueryDict(changelist_filters)
+        changelist_request._object_tool_changelist = True
+        changelist = self.get_changelist_instance(changelist_request)
+        rv = cache[self] = changelist.queryset
+        return rv
+
+    def get_changelist(self, request, **kwargs):
+        changelist_class = super(
+            CustomObjectToolModelAdminMixin, self).get_changelist(
+                request, **kwargs)
+        if getattr(request, "_object_tool_changelist", False):
+            changelist_class = _get_queryset_changelist(changelist_class)
+        return changelist_class
+
+    def object_tool_job_view(self, request, job_id, extra_context=None):
+        """The status page of an object tool running in background"""
+        job = Job.get(job_id)
+        if job is None or job.site != self.admin_site.name\
+                or job.model != self.model._meta.label:
+            raise Http404
+        if job.user_id != request.user.pk and not request.user.is_superuser:
+            return response.HttpResponseForbidden()
+
+        func, name, description = self.get_object_tool(job.tool)
+        obj = None
+        if job.object_id is not None:
+            obj = self.get_object(request, str(job.object_id))
+        context = dict(
+            self.get_object_tool_context(request),
+            opts=self.model._meta,
+            job=job,
+            obj=obj,
+            object_id=obj and obj.pk,
+            object_tool=get_tool_spec(func, name, description),
+            title=description,
+            **(extra_context or {})
+        )
+        request.current_app = self.admin_site.name
+        return TemplateResponse(
+            request, "admin/object_tool/job.html", context)
+
+    async def aget_object_tools(self, request, view=None):
+        """
+        The async version of `get_object_tools`, permission checks run in
+        a thread
+        """
+        return await sync_to_async(self.get_object_tools)(request, view)
 
-        obj = object_id and self.get_object(request, unquote(object_id))
-        return self.response_object_tool(request, action, obj, extra_context)
+    async def aget_object(self, request, object_id, from_field=None):
+        """The async version of `get_object`"""
+        return await sync_to_async(self.get_object)(
+            request, object_id, from_field)
 
     @csrf_protect_m
     def changelist_view(self, request, extra_context=None):
-        extra_context = self._prepare_object_tool_view(request, extra_context)
+        extra_context = self._prepare_object_tool_view(
+            request, extra_context, "changelist")
         extra_context.update(
             object_tool_base_template=self._base_change_list_template,
             changelist_filters=dict(
@@ -239,7 +809,8 @@ class CustomObjectToolModelAdminMixin(object):
 
     @csrf_protect_m
     def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
-        extra_context = self._prepare_object_tool_view(request, extra_context)
+        extra_context = self._prepare_object_tool_view(
+            request, extra_context, "change" if object_id else "add")
         extra_context.update(
             object_tool_base_template=self._base_change_form_template,
             changelist_filters=dict(
@@ -249,16 +820,73 @@ class CustomObjectToolModelAdminMixin(object):
         return super(CustomObjectToolModelAdminMixin, self).changeform_view(
             request, object_id, form_url, extra_context)
 
-    def _prepare_object_tool_view(self, request, extra_context=None):
+    def _prepare_object_tool_view(self, request, extra_context=None, view=None):
         # update context
         extra_context = extra_context or {}
+        view = view or self._get_view_name(request)
+        specs = self._get_object_tool_specs(view)
+        object_tools = self.get_object_tools(request, view)
         extra_context.update(
-            object_tools=tuple(map(
-                lambda o: object_tool_context(*o),
-                self.get_object_tools(request).values()))
+            object_tools=tuple(
+                specs.get(name) or get_tool_spec(*tool)
+                for name, tool in object_tools.items()),
+            object_tools_disabled=self._get_disabled_object_tools(
+                request, object_tools),
+            object_tool_signature=self._get_object_tool_signature(view)
         )
         return extra_context
 
+    def _get_disabled_object_tools(self, request, object_tools):
+        """names of the tools the user is throttled from"""
+        disabled = set()
+        for name, tool in object_tools.items():
+            throttle = Throttle.for_tool(self, request, tool[0], name)
+            if throttle is not None and throttle.wait() is not None:
+                disabled.add(name)
+        return frozenset(disabled)
+
+    def _get_object_tool_signature(self, view):
+        """identify the tools rendered in a view of this model admin"""
+        return (
+            self.admin_site.name,
+            self.model._meta.label,
+            "%s.%s" % (self.__class__.__module__, self.__class__.__name__),
+            getattr(self.admin_site, "object_tool_version", None),
+            view
+        )
+
+
+def _get_fetch_hints(action):
+    """
+    The `fetch` attribute of a tool, None, False or a dict of hints, True
+    is the same as empty hints
+    """
+    fetch = getattr(action, "fetch", None)
+    if fetch is True:
+        return {}
+    if fetch is None or fetch is False or isinstance(fetch, Mapping):
+        return fetch
+    raise ValueError("Invalid fetch hints %r of %s" % (
+        fetch, getattr(action, "__name__", action)))
+
+
+_queryset_changelists = {}
+
+
+def _get_queryset_changelist(changelist_class):
+    """
+    Get a subclass of a ChangeList class which only builds the queryset, it
+    doesn't count or paginate the results
+    """
+    try:
+        return _queryset_changelists[changelist_class]
+    except KeyError:
+        rv = _queryset_changelists[changelist_class] = type(
+            str("QuerySet%s" % changelist_class.__name__),
+            (changelist_class, ),
+            dict(get_results=lambda self, request: None))
+        return rv
+
 
 class CustomObjectToolModelAdmin(CustomObjectToolModelAdminMixin, ModelAdmin):
     pass
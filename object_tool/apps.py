@@ -6,8 +6,10 @@ import os
 from django.apps import AppConfig
 from django.conf import settings
 from django.template.engine import Engine
+from django.template.library import import_library
 
 from .sites import patch_admin
+from .template import loaders
 
 
 class ObjectToolConfig(AppConfig):
@@ -15,6 +17,8 @@ class ObjectToolConfig(AppConfig):
 
     def ready(self):
         patch_admin()
+        if getattr(settings, "OBJECT_TOOL_TEMPLATEWARMUP", False):
+            loaders.warm_up()
 
     @classmethod
     def register(cls, ready=False):
@@ -23,9 +27,14 @@ class ObjectToolConfig(AppConfig):
 
         # add template loader to default engine
         template_engine = Engine.get_default()
-        loader = "object_tool.template.loaders.Loader"
-        if loader not in template_engine.loaders:
-            template_engine.loaders = list(template_engine.loaders) + [loader]
+        loaders.install(template_engine)
+
+        # add template tags to default engine
+        library = "object_tool.templatetags.object_tool"
+        if "object_tool" not in template_engine.template_libraries:
+            template_engine.libraries["object_tool"] = library
+            template_engine.template_libraries["object_tool"] = \
+                import_library(library)
 
         # add static dir to settings
         static_dir = os.path.join(BASE_DIR, "static")
@@ -34,5 +43,8 @@ class ObjectToolConfig(AppConfig):
             static_dirs.append(static_dir)
         settings.STATICFILES_DIRS = static_dirs
 
-        ready and cls.ready(None)
+        if ready:
+            cls.ready(None)
+        elif getattr(settings, "OBJECT_TOOL_TEMPLATEWARMUP", False):
+            loaders.warm_up(template_engine.get_template)
 
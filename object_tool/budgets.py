@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from contextlib import contextmanager, ExitStack, nullcontext
+from contextvars import ContextVar
+import time
+
+from django.db import connections
+
+from .utils import get_tool_name
+
+
+__all__ = (
+    "assert_max_queries", "CapturedQueries", "enforce_tool_budgets",
+    "QueryBudgetExceeded")
+
+
+_enforced = ContextVar("object_tool_query_budgets", default=False)
+
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, label, max_queries, queries):
+        self.label = label
+        self.max_queries = max_queries
+        self.queries = queries
+        lines = ["%s executed %d queries, the budget is %d:" % (
+            label, len(queries), max_queries)]
+        lines.extend(
+            "%d. [%s %.2fms] %s" % (
+                i, query["alias"], query["duration"] * 1000, query["sql"])
+            for i, query in enumerate(queries, 1))
+        super(QueryBudgetExceeded, self).__init__("\n".join(lines))
+
+
+class CapturedQueries(object):
+    """
+    Capture the sql queries executed on all databases, or the databases of
+    `using`. Unlike `CaptureQueriesContext`, it works without DEBUG and
+    isn't reset by the `request_started` signal, so it captures queries of
+    test client requests.
+
+        with CapturedQueries() as captured:
+            client.get(url)
+        len(captured)
+    """
+
+    def __init__(self, using=None):
+        self.using = using
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        aliases = [self.using] if isinstance(self.using, str)\
+            else self.using
+        for connection in connections.all():
+            if aliases is None or connection.alias in aliases:
+                self._stack.enter_context(
+                    connection.execute_wrapper(self._capture))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.close()
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __iter__(self):
+        return iter(self.queries)
+
+    def _capture(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(dict(
+                sql=sql, params=params, many=many,
+                alias=context["connection"].alias,
+                duration=time.perf_counter() - start))
+
+
+@contextmanager
+def assert_max_queries(max_queries, label="Block", using=None):
+    """
+    Raise QueryBudgetExceeded listing the sql executed if the block
+    executes more than `max_queries` queries
+    """
+    with CapturedQueries(using) as captured:
+        yield captured
+    if len(captured) > max_queries:
+        raise QueryBudgetExceeded(label, max_queries, captured.queries)
+
+
+@contextmanager
+def enforce_tool_budgets():
+    """Enforce the `max_queries` of object tools executed in the block"""
+    token = _enforced.set(True)
+    try:
+        yield
+    finally:
+        _enforced.reset(token)
+
+
+def tool_query_budget(request, action, name=None):
+    """
+    The context an object tool executes in, checks the `max_queries` of the
+    tool dispatched as `name` if budgets are enforced by `enforce_tool_budgets` or the
+    `QueryBudgetMiddleware`. Like `measure`, only queries of the thread
+    entered the context are counted.
+    """
+    max_queries = getattr(action, "max_queries", None)
+    if max_queries is None or not (
+            _enforced.get()
+            or getattr(request, "object_tool_query_budgets", False)):
+        return nullcontext()
+    return assert_max_queries(
+        max_queries, "Object tool %s" % get_tool_name(action, name))
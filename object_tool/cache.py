@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from .utils import OBJECT_ID_PLACEHOLDER, quote_object_id
+
+
+CSRF_TOKEN_PLACEHOLDER = "__objecttool_csrf_token__"
+
+
+def get_cache():
+    """get the cache used by object tool"""
+    return caches[getattr(settings, "OBJECT_TOOL_CACHE", "default")]
+
+
+def make_key(prefix, *parts):
+    digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+    return "object_tool.%s.%s" % (prefix, digest)
+
+
+def toolbar_cache_key(context):
+    """
+    Get the fragment cache key of an object-tools bar, returns None if the
+    bar can't be cached
+    """
+    signature = context.get("object_tool_signature")
+    csrf_token = context.get("csrf_token")
+    if not signature or not csrf_token or csrf_token == "NOTPROVIDED":
+        return None
+    return make_key(
+        "toolbar",
+        signature,
+        tuple(tool.name for tool in context.get("object_tools") or ()),
+        tuple(sorted(context.get("object_tools_disabled") or ())),
+        get_language(),
+        context.get("preserved_filters"),
+        bool(context.get("is_popup")),
+        context.get("to_field"),
+        bool(context.get("object_id"))
+    )
+
+
+def render_toolbar(context, render):
+    """
+    Render an object-tools bar by `render(context)`. When
+    OBJECT_TOOL_TOOLBARCACHE is enabled, the bar is rendered once for
+    every permission outcome of an admin view and cached, the object id and
+    csrf token are filled in afterwards.
+    """
+    if not getattr(settings, "OBJECT_TOOL_TOOLBARCACHE", False):
+        return render(context)
+    key = toolbar_cache_key(context)
+    if key is None:
+        return render(context)
+
+    cache = get_cache()
+    object_id = context.get("object_id")
+    fragment = cache.get(key)
+    if fragment is None:
+        with context.push(
+                object_id=object_id and OBJECT_ID_PLACEHOLDER,
+                csrf_token=CSRF_TOKEN_PLACEHOLDER):
+            fragment = str(render(context))
+        timeout = getattr(settings, "OBJECT_TOOL_TOOLBARCACHETIMEOUT", 300)
+        cache.set(key, fragment, timeout)
+
+    fragment = fragment.replace(
+        CSRF_TOKEN_PLACEHOLDER, escape(str(context.get("csrf_token"))))
+    if object_id:
+        fragment = fragment.replace(
+            OBJECT_ID_PLACEHOLDER, escape(quote_object_id(object_id)))
+    return mark_safe(fragment)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+__all__ = ("FORMATS", "stream_queryset")
+
+
+class Echo(object):
+    """A file-like object returns what is written"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(fields, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + "\n"
+
+
+FORMATS = dict(
+    csv=(iter_csv, "text/csv"),
+    jsonl=(iter_jsonl, "application/x-ndjson")
+)
+
+
+def iter_encoded(lines, chunk_size, compress=False):
+    """
+    Join lines into utf-8 encoded chunks of `chunk_size` lines, the chunks
+    are gzipped on the fly if `compress` is set
+    """
+    compressor = compress and zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            data = "".join(buffer).encode("utf-8")
+            buffer = []
+            data = compressor.compress(data) if compressor else data
+            if data:
+                yield data
+    data = "".join(buffer).encode("utf-8")
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def stream_queryset(queryset, fields=None, format="csv", compress=False, chunk_size=2000, filename=None):
+    """
+    Return a StreamingHttpResponse exports the fields of a queryset, rows
+    are fetched by `queryset.iterator` so memory usage stays constant
+    """
+    try:
+        iter_lines, content_type = FORMATS[format]
+    except KeyError:
+        raise ValueError("unsupported export format {0}".format(format))
+    opts = queryset.model._meta
+    fields = tuple(fields or (f.attname for f in opts.concrete_fields))
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    content = iter_encoded(
+        iter_lines(fields, rows), chunk_size, compress=compress)
+
+    filename = filename or "%s.%s" % (opts.model_name, format)
+    if compress:
+        content_type = "application/gzip"
+        filename += ".gz"
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = 'attachment; filename="%s"' % filename
+    return response
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import csv
+import io
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, router, transaction
+from django.forms.models import modelform_factory
+
+
+__all__ = ("CSVImporter", "ImportResult")
+
+
+class ImportResult(object):
+    """The outcome of an import"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        """a list of (line number, errors) of the rows failed"""
+
+    def __repr__(self):
+        return "<ImportResult rows=%d created=%d updated=%d errors=%d>" % (
+            self.rows, self.created, self.updated, len(self.errors))
+
+
+class CSVImporter(object):
+    """
+    Import an uploaded csv file into the model of a model admin, use it with
+    the `importer` parameter of `object_tool.form`
+
+        @object_tool.form(
+            ImportForm, "import",
+            importer=CSVImporter(key_field="name", batch_size=1000))
+        def import_users(self, request, form, result, obj=None):
+            messages.info(request, "%d created" % result.created)
+
+    The file is parsed incrementally from its temporary file. Rows are
+    validated by `row_form`, a model form of the fields in the csv header
+    by default, and written by `bulk_create` or `bulk_update` every
+    `batch_size` rows. Rows whose `key_field` matches an existing object
+    update the object. Invalid rows and batches failed to write are
+    recorded in the result without stopping the import.
+
+    Unique checks of the row form are skipped to avoid a query per row,
+    they are left to the database constraints unless `validate_unique` is
+    set.
+    """
+
+    def __init__(self, row_form=None, fields=None, key_field=None, update_fields=None, batch_size=500, encoding="utf-8-sig", validate_unique=False, **fmtparams):
+        self.row_form = row_form
+        self.fields = fields
+        self.key_field = key_field
+        self.update_fields = update_fields
+        self.batch_size = batch_size
+        self.encoding = encoding
+        self.validate_unique = validate_unique
+        self.fmtparams = fmtparams
+
+    def run(self, modeladmin, request, file):
+        """Import an uploaded file, returns an ImportResult"""
+        result = ImportResult()
+        job = getattr(request, "object_tool_job", None)
+        file.seek(0)
+        stream = io.TextIOWrapper(file.file, encoding=self.encoding, newline="")
+        try:
+            reader = csv.DictReader(stream, **self.fmtparams)
+            form_class = self.get_row_form(modeladmin, reader.fieldnames)
+            batch = []
+            for row in reader:
+                batch.append((reader.line_num, row))
+                if len(batch) >= self.batch_size:
+                    self.import_batch(form_class, batch, result)
+                    batch = []
+                    job and job.set_progress(result.rows)
+            batch and self.import_batch(form_class, batch, result)
+        finally:
+            # leave the uploaded file open
+            stream.detach()
+        return result
+
+    def get_row_form(self, modeladmin, fieldnames):
+        form_class = self.row_form
+        if not form_class:
+            opts = modeladmin.model._meta
+            model_fields = {f.name for f in opts.concrete_fields}
+            fields = self.fields or [
+                name for name in fieldnames or ()
+                if name in model_fields and name != opts.pk.name]
+            form_class = modelform_factory(modeladmin.model, fields=fields)
+        if not self.validate_unique:
+            form_class = type(
+                str("Import%s" % form_class.__name__), (form_class, ),
+                dict(validate_unique=lambda self: None))
+        return form_class
+
+    def import_batch(self, form_class, batch, result):
+        model = form_class._meta.model
+        manager = model._default_manager.db_manager(
+            router.db_for_write(model))
+        existing = {}
+        keys = {}
+        invalid = {}
+        if self.key_field:
+            key_field = model._meta.get_field(self.key_field)
+            for line, row in batch:
+                value = row.get(self.key_field)
+                if value not in (None, ""):
+                    try:
+                        keys[line] = key_field.to_python(value)
+                    except ValidationError as e:
+                        invalid[line] = {self.key_field: e.messages}
+            existing = manager.in_bulk(
+                set(keys.values()), field_name=self.key_field)
+
+        creates, updates = [], []
+        for line, row in batch:
+            if line in invalid:
+                # never create a new object for a row of an invalid key
+                result.errors.append((line, invalid[line]))
+                continue
+            instance = existing.get(keys.get(line))
+            form = form_class(data=row, instance=instance)
+            if form.is_valid():
+                obj = form.save(commit=False)
+                if instance is None:
+                    creates.append((line, obj))
+                else:
+                    updates.append((line, obj))
+            else:
+                result.errors.append((line, form.errors))
+        result.rows += len(batch)
+
+        update_fields = self.update_fields or [
+            name for name in form_class.base_fields
+            if name != self.key_field]
+        try:
+            with transaction.atomic(using=manager.db):
+                creates and manager.bulk_create([obj for _, obj in creates])
+                updates and update_fields and manager.bulk_update(
+                    [obj for _, obj in updates], update_fields)
+        except DatabaseError as e:
+            result.errors.extend(
+                (line, [str(e)]) for line, _ in creates + updates)
+        else:
+            result.created += len(creates)
+            result.updated += len(updates)
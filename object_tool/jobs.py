@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from concurrent import futures
+import logging
+import multiprocessing
+import threading
+import time
+import traceback
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.admin.sites import all_sites
+from django.contrib.messages import constants
+from django.contrib.messages.utils import get_level_tags
+from django.db import connections
+from django.http import HttpRequest
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+
+from .cache import get_cache
+
+
+__all__ = ("Job", "get_executor", "submit")
+
+
+logger = logging.getLogger(__name__)
+
+
+class Job(object):
+    """
+    The state of an object tool running in background, jobs are stored in
+    the cache configured by OBJECT_TOOL_CACHE so a job's status can be read
+    from any worker
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILURE = "failure"
+
+    STATES = (
+        (PENDING, _("Pending")),
+        (RUNNING, _("Running")),
+        (SUCCESS, _("Success")),
+        (FAILURE, _("Failure")),
+    )
+
+    fields = (
+        "id", "site", "model", "tool", "object_id", "user_id", "state",
+        "done", "total", "messages", "error", "created", "updated")
+
+    def __init__(self, id, site, model, tool, object_id=None, user_id=None,
+                 state=PENDING, done=0, total=None, messages=(), error=None,
+                 created=None, updated=None):
+        self.id = id
+        self.site = site
+        self.model = model
+        self.tool = tool
+        self.object_id = object_id
+        self.user_id = user_id
+        self.state = state
+        self.done = done
+        self.total = total
+        self.messages = list(messages)
+        self.error = error
+        self.created = created or time.time()
+        self.updated = updated or self.created
+
+    @classmethod
+    def create(cls, modeladmin, tool, request, obj=None):
+        job = cls(
+            uuid.uuid4().hex, modeladmin.admin_site.name,
+            modeladmin.model._meta.label, tool, obj and obj.pk,
+            request.user.pk)
+        job.save()
+        return job
+
+    @classmethod
+    def get(cls, id):
+        """Get a job by id, returns None if the job is missing or expired"""
+        data = get_cache().get(cls._get_key(id))
+        return data and cls(**data)
+
+    @staticmethod
+    def _get_key(id):
+        return "object_tool.job.%s" % id
+
+    @property
+    def finished(self):
+        return self.state in (self.SUCCESS, self.FAILURE)
+
+    def get_state_display(self):
+        return dict(self.STATES)[self.state]
+
+    def save(self):
+        self.updated = time.time()
+        timeout = getattr(settings, "OBJECT_TOOL_JOBTIMEOUT", 86400)
+        data = {field: getattr(self, field) for field in self.fields}
+        get_cache().set(self._get_key(self.id), data, timeout)
+
+    def set_progress(self, done, total=None):
+        """Report the progress of the job"""
+        self.done = done
+        if total is not None:
+            self.total = total
+        self.save()
+
+    def add_message(self, level, message):
+        tag = get_level_tags().get(level, "")
+        self.messages.append((tag, str(message)))
+        self.save()
+
+
+class JobMessageStorage(object):
+    """
+    A message storage collects the messages added by a background tool into
+    its job
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.level = getattr(settings, "MESSAGE_LEVEL", constants.INFO)
+
+    def add(self, level, message, extra_tags=""):
+        if message and level >= self.level:
+            self.job.add_message(level, message)
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+
+def detach_request(request, job):
+    """
+    Copy the parts of a request a background tool may use, the copy is
+    picklable and stays usable after the response is returned
+    """
+    rv = HttpRequest()
+    rv.method = request.method
+    rv.path = request.path
+    rv.path_info = request.path_info
+    rv.GET = request.GET.copy()
+    rv.POST = request.POST.copy()
+    rv.META = {
+        key: value for key, value in request.META.items()
+        if isinstance(value, (str, int, float, bool))
+    }
+    rv.user = getattr(request, "user", None)
+    rv.current_app = job.site
+    rv.object_tool_job = job
+    rv._messages = JobMessageStorage(job)
+    return rv
+
+
+def submit(modeladmin, tool, request, obj=None, executor=None):
+    """Submit an object tool to the executor and return the job"""
+    job = Job.create(modeladmin, tool, request, obj)
+    executor = get_executor(executor)
+    executor.submit(run_job, job.id, detach_request(request, job))
+    return job
+
+
+def run_job(job_id, request):
+    """Run the background tool of a job"""
+    job = request.object_tool_job = request._messages.job = Job.get(job_id)
+    if job is None:
+        return
+    job.state = Job.RUNNING
+    job.save()
+    try:
+        modeladmin = get_model_admin(job.site, job.model)
+        func = modeladmin.get_object_tool(job.tool)[0].object_tool_background
+        obj = None
+        if job.object_id is not None:
+            obj = modeladmin.get_object(request, str(job.object_id))
+        func(modeladmin, request, obj)
+    except Exception as e:
+        logger.exception("Background object tool %s failed", job.tool)
+        job.state = Job.FAILURE
+        # whoever can view the job reads the error, the traceback is only
+        # shown in debug mode
+        job.error = traceback.format_exc() if settings.DEBUG\
+            else traceback.format_exception_only(type(e), e)[-1].strip()
+    else:
+        job.state = Job.SUCCESS
+    finally:
+        job.save()
+
+
+def get_model_admin(site_name, model_label):
+    model = apps.get_model(model_label)
+    for site in all_sites:
+        if site.name == site_name and model in site._registry:
+            return site._registry[model]
+    raise LookupError(
+        "model admin of {0} not found in site {1}".format(
+            model_label, site_name))
+
+
+class SyncExecutor(object):
+    """Run jobs immediately, useful in tests and debugging"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = futures.Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def _setup_process():
+    import django
+    from django.urls import get_resolver
+
+    django.setup()
+    # admin sites defined along with urlconfs are registered on import
+    get_resolver().url_patterns
+
+
+class ThreadExecutor(futures.ThreadPoolExecutor):
+    """Run jobs in a thread pool, database connections are closed after"""
+
+    def submit(self, fn, *args, **kwargs):
+        return super(ThreadExecutor, self).submit(
+            self._run, fn, *args, **kwargs)
+
+    @staticmethod
+    def _run(fn, *args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+
+def thread_executor():
+    return ThreadExecutor(
+        getattr(settings, "OBJECT_TOOL_BACKGROUNDWORKERS", None),
+        thread_name_prefix="object_tool")
+
+
+def process_executor():
+    return futures.ProcessPoolExecutor(
+        getattr(settings, "OBJECT_TOOL_BACKGROUNDWORKERS", None),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_setup_process)
+
+
+EXECUTORS = dict(
+    thread=thread_executor, process=process_executor, sync=SyncExecutor)
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name=None):
+    """
+    Get an executor by name, OBJECT_TOOL_BACKGROUNDEXECUTOR is used if
+    name is omitted. The name is 'thread', 'process', 'sync' or the dotted
+    path of a callable returns an object with a `submit` method.
+    """
+    name = name or getattr(
+        settings, "OBJECT_TOOL_BACKGROUNDEXECUTOR", "thread")
+    try:
+        return _executors[name]
+    except KeyError:
+        with _executors_lock:
+            if name not in _executors:
+                factory = EXECUTORS.get(name) or import_string(name)
+                _executors[name] = factory()
+        return _executors[name]
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import asyncio
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections, DEFAULT_DB_ALIAS, NotSupportedError
+from django.dispatch import receiver
+from django.http import HttpResponseRedirect
+from django.http.response import HttpResponseRedirectBase
+from django.utils.module_loading import import_string
+
+from .cache import get_cache, make_key
+from .utils import get_tool_name
+
+
+__all__ = (
+    "CacheLockBackend", "DatabaseLockBackend", "get_lock_backend",
+    "ToolLock")
+
+
+REJECT = "reject"
+WAIT = "wait"
+COALESCE = "coalesce"
+
+
+class CacheLockBackend(object):
+    """Locks by `cache.add` of the object tool cache"""
+
+    def acquire(self, key, token, timeout):
+        return get_cache().add(key, token, timeout)
+
+    def release(self, key, token):
+        cache = get_cache()
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+class DatabaseLockBackend(object):
+    """
+    Locks by the advisory locks of PostgreSQL or MySQL. A lock is held by
+    the database session, it doesn't expire but is released when the
+    connection is closed.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def acquire(self, key, token, timeout):
+        connection = connections[self.using]
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT pg_try_advisory_lock(%s)", [self._int_key(key)])
+            elif connection.vendor == "mysql":
+                cursor.execute("SELECT GET_LOCK(%s, 0)", [key])
+            else:
+                raise NotSupportedError(
+                    "Advisory locks are not supported by %s"
+                    % connection.vendor)
+            return bool(cursor.fetchone()[0])
+
+    def release(self, key, token):
+        connection = connections[self.using]
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT pg_advisory_unlock(%s)", [self._int_key(key)])
+            else:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", [key])
+
+    @staticmethod
+    def _int_key(key):
+        # a signed 64 bits integer from the md5 digest in the key
+        return int(key.rsplit(".", 1)[-1][:16], 16) - 2 ** 63
+
+
+BACKENDS = dict(cache=CacheLockBackend, database=DatabaseLockBackend)
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_lock_backend(name=None):
+    """
+    Get a lock backend by name, OBJECT_TOOL_LOCKBACKEND is used if name is
+    omitted. The name is 'cache', 'database' or the dotted path of a class
+    with `acquire(key, token, timeout)` and `release(key, token)` methods.
+    """
+    name = name or getattr(settings, "OBJECT_TOOL_LOCKBACKEND", "cache")
+    try:
+        return _backends[name]
+    except KeyError:
+        with _backends_lock:
+            if name not in _backends:
+                factory = BACKENDS.get(name) or import_string(name)
+                _backends[name] = factory()
+        return _backends[name]
+
+
+@receiver(setting_changed)
+def clear_lock_backends(setting=None, **kwargs):
+    if setting == "OBJECT_TOOL_LOCKBACKEND":
+        _backends.clear()
+
+
+class ToolLock(object):
+    """
+    The lock of an object tool, keyed by the site, model, tool and the pk of
+    the object. The tool declares it by attributes
+
+        lock
+            True to lock the executions of the tool
+        lock_policy
+            what the second execution does when the tool is running,
+            'reject' (default) the execution, 'wait' for the lock, or
+            'coalesce' into the running execution and take its redirect
+        lock_timeout
+            seconds a lock lasts and an execution waits, 300 by default
+    """
+
+    interval = 0.1
+    """seconds between attempts to acquire the lock"""
+
+    def __init__(self, key, policy=REJECT, timeout=300, backend=None):
+        if policy not in (REJECT, WAIT, COALESCE):
+            raise ValueError("Invalid lock policy %r" % policy)
+        self.key = key
+        self.policy = policy
+        self.timeout = timeout
+        self.backend = backend or get_lock_backend()
+        self.token = None
+
+    @classmethod
+    def for_tool(cls, modeladmin, action, obj=None, name=None):
+        """
+        the lock of a tool dispatched as `name`, returns None if the tool
+        isn't locked
+        """
+        if not getattr(action, "lock", False):
+            return None
+        key = make_key(
+            "lock", modeladmin.admin_site.name,
+            modeladmin.model._meta.label_lower,
+            get_tool_name(action, name),
+            None if obj is None else str(obj.pk))
+        return cls(
+            key, getattr(action, "lock_policy", REJECT),
+            getattr(action, "lock_timeout", 300))
+
+    def acquire(self):
+        """try to acquire the lock without blocking"""
+        token = uuid.uuid4().hex
+        if self.backend.acquire(self.key, token, self.timeout):
+            self.token = token
+            # the running execution coalesced executions wait for
+            get_cache().set(self.key + ".run", token, self.timeout)
+            return True
+        return False
+
+    def release(self):
+        self.backend.release(self.key, self.token)
+        self.token = None
+
+    def finish(self, response):
+        """
+        store the redirect url of the execution for coalesced executions,
+        other responses are rendered for the user who ran the tool and are
+        not shared
+        """
+        if self.policy == COALESCE:
+            url = response.url\
+                if isinstance(response, HttpResponseRedirectBase) else None
+            get_cache().set(
+                self.key + ".result." + self.token, url, self.timeout)
+        return response
+
+    def run(self, execute, busy):
+        """
+        Execute under the lock, `busy` is called to make the response of
+        an execution rejected, or coalesced without a stored response
+        """
+        if self.acquire():
+            return self._execute(execute)
+        if self.policy == REJECT:
+            return busy(False)
+
+        running = get_cache().get(self.key + ".run")
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.interval)
+            found, rv = self._coalesced(running)
+            if found:
+                return rv or busy(True)
+            if self.acquire():
+                return self._execute(execute)
+        return busy(False)
+
+    async def arun(self, execute, busy):
+        """the async version of `run`, `execute` is a coroutine function"""
+        if await sync_to_async(self.acquire)():
+            return await self._aexecute(execute)
+        if self.policy == REJECT:
+            return busy(False)
+
+        running = await sync_to_async(get_cache().get)(self.key + ".run")
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.interval)
+            found, rv = await sync_to_async(self._coalesced)(running)
+            if found:
+                return rv or busy(True)
+            if await sync_to_async(self.acquire)():
+                return await self._aexecute(execute)
+        return busy(False)
+
+    def _execute(self, execute):
+        try:
+            return self.finish(execute())
+        finally:
+            self.release()
+
+    async def _aexecute(self, execute):
+        try:
+            rv = await execute()
+            return await sync_to_async(self.finish)(rv)
+        finally:
+            await sync_to_async(self.release)()
+
+    def _coalesced(self, running):
+        """returns whether the running execution finished and its response"""
+        if self.policy != COALESCE or not running:
+            return False, None
+        cache = get_cache()
+        key = self.key + ".result." + running
+        if key not in cache:
+            return False, None
+        url = cache.get(key)
+        return True, url and HttpResponseRedirect(url)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from ...metrics import aggregator
+
+
+class Command(BaseCommand):
+    help = "Dump the object tool metrics collected by " \
+        "object_tool.metrics.aggregator"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json", action="store_true", help="output as json")
+        parser.add_argument(
+            "--reset", action="store_true",
+            help="clear the metrics after dumped")
+
+    def handle(self, *args, **options):
+        stats = aggregator.stats()
+        if options["json"]:
+            self.stdout.write(json.dumps(stats, indent=2))
+        elif stats:
+            row = "{:<32} {:>7} {:>6} {:>9} {:>9} {:>9} {:>7} {:>7}"
+            self.stdout.write(row.format(
+                "tool", "count", "errors", "p50 ms", "p95 ms", "p99 ms",
+                "q p50", "q p99"))
+            for stat in stats:
+                self.stdout.write(row.format(
+                    "%s.%s" % (stat["model"], stat["tool"]),
+                    stat["count"], stat["errors"],
+                    "%.1f" % (stat["wall_p50"] * 1000),
+                    "%.1f" % (stat["wall_p95"] * 1000),
+                    "%.1f" % (stat["wall_p99"] * 1000),
+                    stat["queries_p50"], stat["queries_p99"]))
+        else:
+            self.stdout.write("No object tool metrics collected.")
+
+        if options["reset"]:
+            aggregator.reset()
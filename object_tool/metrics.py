@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import namedtuple
+from contextlib import ExitStack
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .cache import get_cache, make_key
+from .signals import post_object_tool, pre_object_tool
+from .utils import get_tool_name
+
+
+__all__ = ("aggregator", "CacheAggregator", "measure", "ToolMetrics")
+
+
+logger = logging.getLogger(__name__)
+
+
+class ToolMetrics(namedtuple("ToolMetrics", (
+        "tool", "model", "view", "wall_time", "cpu_time", "queries",
+        "rows", "response_type", "exception"))):
+    """
+    The metrics of an object tool execution. Times are in seconds, `rows`
+    is the sum of rows affected by the write statements the database
+    reported, `exception` is the exception raised by the tool if any.
+    """
+    __slots__ = ()
+
+
+_hooks = None
+
+
+def get_hooks():
+    """the metrics hooks configured by OBJECT_TOOL_METRICS"""
+    global _hooks
+    if _hooks is None:
+        _hooks = tuple(
+            import_string(hook) if isinstance(hook, str) else hook
+            for hook in getattr(settings, "OBJECT_TOOL_METRICS", ()))
+    return _hooks
+
+
+@receiver(setting_changed)
+def clear_hooks(setting=None, **kwargs):
+    global _hooks
+    if setting == "OBJECT_TOOL_METRICS":
+        _hooks = None
+
+
+class measure(object):
+    """
+    Measure an object tool execution. `pre_object_tool` is sent on enter,
+    the metrics are collected only if there are hooks or receivers of
+    `post_object_tool`. Pass the response to `finish` to record its type.
+
+        with measure(modeladmin, request, action, obj, name) as measurement:
+            return measurement.finish(action(modeladmin, request, obj))
+
+    `name` is the name the tool is dispatched under, the name of the
+    function by default. Exceptions raised by hooks and receivers of
+    `post_object_tool` are logged rather than failing the execution, which
+    may have been committed already.
+
+    The queries are counted on the connections of the thread entered the
+    measurement, and the cpu time is of that thread. Async views enter it
+    in the thread `sync_to_async` runs queries in, so queries of async tools
+    are counted unless they run in other threads, e.g. by
+    `sync_to_async(thread_sensitive=False)`.
+    """
+
+    def __init__(self, modeladmin, request, action, obj=None, name=None):
+        self.modeladmin = modeladmin
+        self.request = request
+        self.tool = get_tool_name(action, name)
+        self.obj = obj
+        self.response = None
+        self.queries = 0
+        self.rows = None
+        self._stack = None
+
+    def __enter__(self):
+        model = self.modeladmin.model
+        pre_object_tool.send(
+            sender=model, modeladmin=self.modeladmin, request=self.request,
+            tool=self.tool, obj=self.obj)
+        self.hooks = get_hooks()
+        if self.hooks or post_object_tool.has_listeners(model):
+            self._stack = ExitStack()
+            for connection in connections.all():
+                self._stack.enter_context(
+                    connection.execute_wrapper(self._count))
+            self._wall = time.perf_counter()
+            self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._stack is None:
+            return
+        wall_time = time.perf_counter() - self._wall
+        cpu_time = time.thread_time() - self._cpu
+        self._stack.close()
+
+        opts = self.modeladmin.model._meta
+        metrics = ToolMetrics(
+            tool=self.tool,
+            model=opts.label_lower,
+            view="changelist" if self.obj is None else "change",
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            queries=self.queries,
+            rows=self.rows,
+            response_type=self.response.__class__.__name__
+            if self.response is not None else None,
+            exception=exc_value)
+        for hook in self.hooks:
+            try:
+                hook(metrics)
+            except Exception:
+                logger.exception(
+                    "Metrics hook %r of object tool %s failed",
+                    hook, self.tool)
+        responses = post_object_tool.send_robust(
+            sender=self.modeladmin.model, modeladmin=self.modeladmin,
+            request=self.request, tool=self.tool, obj=self.obj,
+            metrics=metrics)
+        for receiver, rv in responses:
+            if isinstance(rv, Exception):
+                logger.error(
+                    "Receiver %r of post_object_tool failed", receiver,
+                    exc_info=(type(rv), rv, rv.__traceback__))
+
+    def finish(self, response):
+        self.response = response
+        return response
+
+    def _count(self, execute, sql, params, many, context):
+        self.queries += 1
+        rv = execute(sql, params, many, context)
+        if not sql.lstrip()[:6].upper() == "SELECT":
+            rowcount = getattr(context["cursor"], "rowcount", -1)
+            if rowcount is not None and rowcount >= 0:
+                self.rows = (self.rows or 0) + rowcount
+        return rv
+
+
+def percentile(values, percent):
+    """the nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    index = max(int(math.ceil(percent / 100.0 * len(values))) - 1, 0)
+    return values[index]
+
+
+class CacheAggregator(object):
+    """
+    A metrics hook keeps the recent samples of each tool in the object tool
+    cache, the latest OBJECT_TOOL_METRICSSAMPLES (1000) samples are kept.
+    With the default local memory cache the samples live in the process,
+    configure a shared OBJECT_TOOL_CACHE to aggregate across processes.
+
+    Samples are written to the slots of a ring buffer numbered by
+    `cache.incr`, so concurrent executions don't overwrite each other.
+    """
+
+    prefix = "metrics"
+
+    def __call__(self, metrics):
+        cache = get_cache()
+        key = (metrics.model, metrics.tool)
+        if cache.add(make_key(self.prefix, "known", *key), True, None):
+            # registered once per tool
+            slot = self._next(cache, make_key(self.prefix, "index"))
+            cache.set(make_key(self.prefix, "index", slot), key, None)
+
+        limit = self._limit()
+        seq = self._next(cache, make_key(self.prefix, "count", *key))
+        cache.set(make_key(self.prefix, "sample", *key, (seq - 1) % limit), (
+            metrics.wall_time, metrics.cpu_time, metrics.queries,
+            metrics.rows, metrics.exception is not None), None)
+
+    def stats(self):
+        """the statistics of every tool measured, as a list of dicts"""
+        rv = []
+        for model, tool in sorted(self._tools(get_cache())):
+            samples = self._samples(get_cache(), (model, tool))
+            if not samples:
+                continue
+            wall_times = sorted(sample[0] for sample in samples)
+            cpu_times = sorted(sample[1] for sample in samples)
+            queries = sorted(sample[2] for sample in samples)
+            rv.append(dict(
+                model=model,
+                tool=tool,
+                count=len(samples),
+                errors=sum(sample[4] for sample in samples),
+                wall_p50=percentile(wall_times, 50),
+                wall_p95=percentile(wall_times, 95),
+                wall_p99=percentile(wall_times, 99),
+                cpu_p50=percentile(cpu_times, 50),
+                cpu_p95=percentile(cpu_times, 95),
+                cpu_p99=percentile(cpu_times, 99),
+                queries_p50=percentile(queries, 50),
+                queries_p95=percentile(queries, 95),
+                queries_p99=percentile(queries, 99),
+                rows=sum(sample[3] or 0 for sample in samples)))
+        return rv
+
+    def reset(self):
+        cache = get_cache()
+        keys = [make_key(self.prefix, "index")]
+        count = cache.get(keys[0]) or 0
+        keys.extend(
+            make_key(self.prefix, "index", slot)
+            for slot in range(1, count + 1))
+        limit = self._limit()
+        for key in self._tools(cache):
+            keys.append(make_key(self.prefix, "known", *key))
+            keys.append(make_key(self.prefix, "count", *key))
+            keys.extend(
+                make_key(self.prefix, "sample", *key, slot)
+                for slot in range(limit))
+        cache.delete_many(keys)
+
+    def _limit(self):
+        return getattr(settings, "OBJECT_TOOL_METRICSSAMPLES", 1000)
+
+    @staticmethod
+    def _next(cache, key):
+        """atomically increase a counter, returns the new value"""
+        cache.add(key, 0, None)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # the counter expired or was evicted in between
+            cache.add(key, 0, None)
+            return cache.incr(key)
+
+    def _tools(self, cache):
+        count = cache.get(make_key(self.prefix, "index")) or 0
+        slots = [
+            make_key(self.prefix, "index", slot)
+            for slot in range(1, count + 1)]
+        return set(cache.get_many(slots).values())
+
+    def _samples(self, cache, key):
+        count = cache.get(make_key(self.prefix, "count", *key)) or 0
+        slots = [
+            make_key(self.prefix, "sample", *key, slot)
+            for slot in range(min(count, self._limit()))]
+        return list(cache.get_many(slots).values())
+
+
+aggregator = CacheAggregator()
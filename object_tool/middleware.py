@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .admin import CustomObjectToolModelAdminMixin
+from .budgets import CapturedQueries, QueryBudgetExceeded
+
+
+__all__ = ("QueryBudgetMiddleware", )
+
+
+class QueryBudgetMiddleware(object):
+    """
+    Enforce query budgets of object tool admin views in DEBUG mode. The
+    budgets of `changelist`, `change`, `add` and `objecttool` views are
+    read from `object_tool_query_budgets` of the model admin, or the
+    OBJECT_TOOL_QUERYBUDGETS setting, and cover the whole request. The
+    `max_queries` of object tools are enforced as well. A
+    `QueryBudgetExceeded` listing the sql executed is raised when a budget
+    is exceeded.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.object_tool_query_budgets = True
+        with CapturedQueries() as captured:
+            response = self.get_response(request)
+        budget = getattr(request, "_object_tool_query_budget", None)
+        if budget and len(captured) > budget[1]:
+            raise QueryBudgetExceeded(budget[0], budget[1], captured.queries)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        modeladmin = getattr(view_func, "model_admin", None)
+        match = getattr(request, "resolver_match", None)
+        if not isinstance(modeladmin, CustomObjectToolModelAdminMixin)\
+                or not match or not match.url_name:
+            return None
+        view = match.url_name.rsplit("_", 1)[-1]
+        budgets = getattr(modeladmin, "object_tool_query_budgets", None)\
+            or getattr(settings, "OBJECT_TOOL_QUERYBUDGETS", {})
+        if view in budgets:
+            request._object_tool_query_budget = (
+                "%s %s view" % (modeladmin, view), budgets[view])
+        return None
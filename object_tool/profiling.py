@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from contextlib import ExitStack
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+__all__ = ("Profile", "PROFILE_PARAM")
+
+
+PROFILE_PARAM = "_objecttool_profile"
+
+SORT_KEYS = ("calls", "cumulative", "ncalls", "pcalls", "time", "tottime")
+
+
+class Profile(object):
+    """
+    Run an object tool under cProfile and capture its sql queries with
+    their durations. Only the thread entered the profile is profiled.
+    """
+
+    def __init__(self, sort="cumulative", limit=50):
+        self.sort = sort if sort in SORT_KEYS else "cumulative"
+        self.limit = limit
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.filename = None
+        self._stack = None
+
+    @classmethod
+    def for_request(cls, request, action):
+        """
+        Returns a Profile if the execution should be profiled, that is
+        OBJECT_TOOL_PROFILE is set, the user is a superuser, and either the
+        tool has a truthy `profile` attribute or the request comes with a
+        `_objecttool_profile` parameter, whose value may be a sort key.
+        """
+        if not getattr(settings, "OBJECT_TOOL_PROFILE", False):
+            return None
+        user = getattr(request, "user", None)
+        if not user or not user.is_superuser:
+            return None
+        sort = request.GET.get(PROFILE_PARAM)
+        if sort is None and not getattr(action, "profile", False):
+            return None
+        return cls(sort=sort or "cumulative")
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(
+                connection.execute_wrapper(self._capture))
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        self._stack.close()
+
+    def _capture(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(dict(
+                sql=sql, many=many, alias=context["connection"].alias,
+                duration=time.perf_counter() - start))
+
+    @property
+    def query_duration(self):
+        return sum(query["duration"] for query in self.queries)
+
+    def save(self, name):
+        """
+        Write the pstats to OBJECT_TOOL_PROFILEDIR, the temporary directory
+        by default, returns the path
+        """
+        directory = getattr(settings, "OBJECT_TOOL_PROFILEDIR", None)\
+            or tempfile.gettempdir()
+        os.makedirs(directory, exist_ok=True)
+        self.filename = os.path.join(directory, "%s.%s.%d.pstats" % (
+            name, time.strftime("%Y%m%d%H%M%S"), os.getpid()))
+        self.profiler.dump_stats(self.filename)
+        return self.filename
+
+    def summary(self):
+        """the pstats summary sorted by the sort key"""
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.strip_dirs().sort_stats(self.sort).print_stats(self.limit)
+        return stream.getvalue()
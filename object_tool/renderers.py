@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.admin.templatetags.admin_urls import add_preserved_filters
+from django.template.defaulttags import CsrfTokenNode
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe, SafeData
+from django.utils.translation import gettext
+
+from .utils import cached_reverse
+
+
+def render_object_tools_items(context):
+    """
+    Render the items of the object-tools bar from the ToolSpecs in
+    context, the output is identical to
+    `admin/object_tool/object-tools-items.html`
+    """
+    is_popup = context.get("is_popup")
+    to_field = context.get("to_field")
+    disabled = context.get("object_tools_disabled") or ()
+    items = ["\n"]
+    for tool in context.get("object_tools") or ():
+        if tool.href:
+            item = format_html(
+                '\n<a href="{}"{}{}{}>{}</a>\n',
+                add_preserved_filters(context, tool.href, is_popup, to_field),
+                _attr("class", tool.classes),
+                _attr("title", tool.help_text),
+                _attr("target", tool.target),
+                _translate(tool.short_description))
+        else:
+            url = reverse_object_tool_url(
+                context, context.get("opts"), tool.name,
+                context.get("object_id"))
+            if tool.allow_get:
+                hidden = format_html(
+                    '\n<input name="_changelist_filters" type="hidden" '
+                    'value="{}">\n', context.get("changelist_filters"))
+            else:
+                hidden = format_html(
+                    "\n{}\n", CsrfTokenNode().render(context))
+            item = format_html(
+                '\n\n<form action="{}" method="{}">\n{}\n'
+                '<button id="object-tool-button-{}" type="submit"{}{}{}>{}'
+                '</button>\n</form>\n',
+                add_preserved_filters(context, url, is_popup, to_field),
+                "GET" if tool.allow_get else "POST",
+                hidden,
+                tool.name,
+                _attr("class", tool.classes),
+                _attr("title", tool.help_text),
+                mark_safe(" disabled") if tool.name in disabled else "",
+                _translate(tool.short_description))
+        items.append(format_html("\n<li>\n{}\n</li>\n", item))
+    return mark_safe("".join(items))
+
+
+def reverse_object_tool_url(context, opts, name, object_id=None):
+    """
+    Reverse the url of an object tool, the url is cached per admin site,
+    model and tool and only the object id is filled in per render
+    """
+    request = getattr(context, "request", None)
+    try:
+        current_app = request.current_app
+    except AttributeError:
+        try:
+            current_app = request.resolver_match.namespace
+        except AttributeError:
+            current_app = None
+    return cached_reverse(
+        "admin:%s_%s_objecttool" % (opts.app_label, opts.model_name),
+        current_app=current_app, kwargs=dict(action_name=name),
+        object_id=object_id or None)
+
+
+def _attr(name, value):
+    return format_html(' {}="{}"', name, value) if value else ""
+
+
+def _translate(value):
+    """translate a value as `{% trans %}` tag does"""
+    is_safe = isinstance(value, SafeData)
+    msgid = value.replace("%", "%%")
+    msgid = mark_safe(msgid) if is_safe else msgid
+    value = conditional_escape(gettext(msgid))
+    return mark_safe(value.replace("%%", "%"))
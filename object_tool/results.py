@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import threading
+import uuid
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.translation import get_language
+
+from .cache import get_cache, make_key
+from .utils import get_tool_name
+
+
+__all__ = ("connect_invalidation", "invalidate_results", "ResultCache")
+
+
+DEFAULT_TIMEOUT = 300
+
+IGNORED_PARAMS = ("csrfmiddlewaretoken", )
+
+CSRF_USED_KEYS = ("CSRF_COOKIE_NEEDS_UPDATE", "CSRF_COOKIE_USED")
+"""request.META keys set by django's `get_token`"""
+
+PER_USER = "per_user"
+"""stored under the shared key of a response cached per user"""
+
+
+def _label(model):
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    return model._meta.label_lower
+
+
+def get_generation(model):
+    """
+    The generation of the cached results depending on a model, it changes
+    every time the results are invalidated
+    """
+    cache = get_cache()
+    key = make_key("generation", _label(model))
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_results(model):
+    """Invalidate the cached results of tools depending on a model"""
+    get_cache().set(
+        make_key("generation", _label(model)), uuid.uuid4().hex, None)
+
+
+def _invalidate(sender, **kwargs):
+    invalidate_results(sender)
+
+
+_connected = set()
+_connected_lock = threading.Lock()
+
+
+def connect_invalidation(model):
+    """invalidate the results depending on a model when it's saved or deleted"""
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    if model in _connected:
+        return
+    with _connected_lock:
+        if model not in _connected:
+            uid = "object_tool.results.%s" % _label(model)
+            post_save.connect(_invalidate, sender=model, dispatch_uid=uid)
+            post_delete.connect(_invalidate, sender=model, dispatch_uid=uid)
+            _connected.add(model)
+
+
+def get_dependencies(modeladmin, action):
+    """the models the result of a tool depends on"""
+    return tuple(getattr(action, "cache_invalidate", None) or (
+        modeladmin.model, ))
+
+
+class ResultCache(object):
+    """
+    Cache the responses of a pure tool, such as a report. The tool declares
+    it by attributes
+
+        cache_result
+            seconds to cache the response, True for 300 seconds
+        cache_vary
+            names of the request parameters the response depends on, all
+            parameters by default
+        cache_invalidate
+            models whose saving or deleting invalidates the cached
+            responses, the model of the model admin by default
+
+    The key covers the site, model, tool, object, request parameters,
+    language, the permissions of the user and the generations of the
+    models depended. Template responses, which may render the user, are
+    cached per user, and not cached at all if a csrf token is rendered.
+    Only 200 responses are cached, and the messages added by the tool are
+    not replayed.
+    """
+
+    def __init__(self, key, timeout, request=None):
+        self.key = key
+        self.timeout = timeout
+        self.request = request
+        user = getattr(request, "user", None)
+        self.user_key = make_key("result", key, user and user.pk)
+
+    @classmethod
+    def for_tool(cls, modeladmin, request, action, obj=None, name=None):
+        """
+        the result cache of a request to the tool dispatched as `name`, None
+        if the tool isn't cached
+        """
+        timeout = getattr(action, "cache_result", None)
+        if not timeout:
+            return None
+        if timeout is True:
+            timeout = DEFAULT_TIMEOUT
+
+        vary = getattr(action, "cache_vary", None)
+        params = []
+        for data in (request.GET, request.POST):
+            for param in sorted(data):
+                if param in IGNORED_PARAMS or (
+                        vary is not None and param not in vary):
+                    continue
+                params.append((param, tuple(data.getlist(param))))
+
+        user = request.user
+        permissions = (
+            user.is_active, user.is_superuser,
+            tuple(sorted(user.get_all_permissions())))
+        dependencies = get_dependencies(modeladmin, action)
+        for model in dependencies:
+            connect_invalidation(model)
+        key = make_key(
+            "result", modeladmin.admin_site.name,
+            modeladmin.model._meta.label_lower,
+            get_tool_name(action, name),
+            None if obj is None else str(obj.pk),
+            tuple(params), get_language(), permissions,
+            tuple(get_generation(model) for model in dependencies))
+        return cls(key, timeout, request)
+
+    def get(self):
+        cache = get_cache()
+        rv = cache.get(self.key)
+        if rv == PER_USER:
+            rv = cache.get(self.user_key)
+        return rv
+
+    def set(self, response):
+        """cache a response if it's cacheable, returns the response"""
+        if not isinstance(response, HttpResponse) or\
+                response.status_code != 200:
+            return response
+        if not isinstance(response, SimpleTemplateResponse):
+            get_cache().set(self.key, response, self.timeout)
+            return response
+        if not response.is_rendered and self._render(response):
+            # the csrf token is bound to the session of the user
+            return response
+        get_cache().set_many(
+            {self.key: PER_USER, self.user_key: response}, self.timeout)
+        return response
+
+    def _render(self, response):
+        """render a response, returns whether a csrf token was rendered"""
+        meta = getattr(self.request, "META", {})
+        saved = dict(
+            (key, meta.pop(key)) for key in CSRF_USED_KEYS if key in meta)
+        try:
+            response.render()
+        finally:
+            used = any(meta.get(key) for key in CSRF_USED_KEYS)
+            for key, value in saved.items():
+                meta[key] = meta.get(key) or value
+        return used
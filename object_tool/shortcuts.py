@@ -1,13 +1,18 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import asyncio
 from functools import wraps
 
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.db import transaction
 from django.http.response import HttpResponseRedirect
 from django.template.response import TemplateResponse
 from django.utils.translation import gettext_lazy as _
 
-from .utils import object_tool_context, OBJECTTOOL_ALLOWED_PROPERTIES
+from .utils import cached_reverse, OBJECTTOOL_ALLOWED_PROPERTIES, ToolSpec
 
 
 def link(url, short_description, **kwargs):
@@ -23,6 +28,7 @@ def link(url, short_description, **kwargs):
     def wrapper(modeladmin, request, obj=None):
         return HttpResponseRedirect(url)
 
+    kwargs.setdefault("__name__", "link")
     kwargs["short_description"] = short_description
     kwargs["allow_get"] = True
     kwargs["href"] = url
@@ -33,7 +39,189 @@ def link(url, short_description, **kwargs):
     return wrapper
 
 
-def form(form_class, short_description="", template=None, confirm_field="confirm", **kwargs):
+def background(func=None, executor=None):
+    """
+    Run an object tool in background and redirect to the job status page.
+    Messages added to the request are collected into the job, and the
+    progress can be reported by `request.object_tool_job.set_progress`.
+
+        @object_tool.background
+        def make_handsome(self, request, obj=None):
+            self.get_queryset(request).update(handsome=True)
+
+    The executor is set by OBJECT_TOOL_BACKGROUNDEXECUTOR by default. The
+    tool is looked up by its name when the job runs, so it must be
+    registered under the name of the decorated function.
+
+    The confirm page of a tool decorated by `confirm` or `form` is shown in
+    the request, only the confirmed execution is run in background. Tools
+    with an `importer` can't run in background since uploaded files are
+    not passed to jobs.
+    """
+    def decorator(func):
+        if getattr(func, "object_tool_importer", None):
+            raise ValueError(
+                "uploaded files are not available in background, "
+                "{0} can't run in background".format(func.__name__))
+        confirmation = getattr(func, "object_tool_confirmation", None)
+
+        @wraps(func)
+        def wrapper(modeladmin, request, obj=None):
+            if confirmation is not None:
+                rv = confirmation(modeladmin, request, obj)
+                if rv is not None:
+                    return rv
+            from . import jobs
+            job = jobs.submit(modeladmin, func.__name__, request, obj, executor)
+            opts = modeladmin.model._meta
+            return HttpResponseRedirect(cached_reverse(
+                "admin:%s_%s_objecttooljob" % (
+                    opts.app_label, opts.model_name),
+                current_app=modeladmin.admin_site.name,
+                kwargs=dict(job_id=job.id)))
+
+        wrapper.object_tool_background = func
+        return wrapper
+
+    return decorator(func) if func else decorator
+
+
+def batch(short_description="", chunk_size=1000, fields=None, queryset=None, select_for_update=False, **kwargs):
+    """
+    A shortcut for processing the queryset of a tool in chunks
+
+        @object_tool.batch("make handsome", fields=("handsome", ))
+        def make_handsome(self, request, chunk):
+            for user in chunk:
+                user.handsome = True
+            return chunk
+
+    The queryset is walked in primary key order by `chunk_size` objects a
+    time and every chunk is read and processed in its own transaction, the
+    rows of a chunk are locked while processing if `select_for_update` is
+    set, either True or the kwargs of `QuerySet.select_for_update`. Objects
+    returned by the decorated function are saved by `bulk_update` with
+    `fields`. `queryset` is a callable takes the model admin and the request,
+    the changelist queryset filtered by the preserved changelist filters is
+    used if omitted, the tool redirects to the changelist with an error if
+    the filters are invalid. In a change view only the current object is
+    processed, looked up in `get_queryset`.
+    """
+    def decorator(func):
+        name = kwargs.pop("__name__", None) or func.__name__
+
+        @wraps(func)
+        def wrapper(modeladmin, request, obj=None):
+            try:
+                qs = _get_tool_queryset(modeladmin, request, obj, queryset)
+            except IncorrectLookupParameters:
+                return modeladmin.response_object_tool_incorrect_lookup(
+                    request)
+            if select_for_update:
+                qs = qs.select_for_update(
+                    **(select_for_update if isinstance(select_for_update, dict)
+                       else {}))
+
+            job = getattr(request, "object_tool_job", None)
+            total = job and qs.count()
+            done = chunks = 0
+            last_pk = None
+            while True:
+                with transaction.atomic(using=qs.db):
+                    chunk = read_chunk(qs, chunk_size, last_pk)
+                    if not chunk:
+                        break
+                    modified = func(modeladmin, request, chunk)
+                    if modified:
+                        if not fields:
+                            raise ValueError(
+                                "fields are required to save the objects "
+                                "modified by {0}".format(name))
+                        qs.model._base_manager.using(qs.db).bulk_update(
+                            modified, fields)
+                done += len(chunk)
+                chunks += 1
+                job and job.set_progress(done, total)
+                if len(chunk) < chunk_size:
+                    break
+                last_pk = chunk[-1].pk
+
+            messages.success(request, _(
+                "%(count)d objects processed in %(chunks)d batches") % dict(
+                    count=done, chunks=chunks))
+
+        kwargs["short_description"] = short_description or name
+        for key, value in kwargs.items():
+            if key in OBJECTTOOL_ALLOWED_PROPERTIES:
+                setattr(wrapper, key, value)
+        wrapper.__name__ = name
+
+        return wrapper
+
+    return decorator
+
+
+def _get_tool_queryset(modeladmin, request, obj=None, queryset=None):
+    if queryset:
+        qs = queryset(modeladmin, request)
+    elif obj is not None:
+        # the changelist filters have nothing to do with a change view
+        qs = modeladmin.get_queryset(request)
+    else:
+        qs = modeladmin.get_object_tool_queryset(request)
+    if obj is not None:
+        qs = qs.filter(pk=obj.pk)
+    return qs
+
+
+def read_chunk(queryset, chunk_size, last_pk=None):
+    """
+    Read at most `chunk_size` objects of a queryset in primary key order,
+    starting after `last_pk`
+    """
+    queryset = queryset.order_by("pk")
+    if last_pk is not None:
+        queryset = queryset.filter(pk__gt=last_pk)
+    return list(queryset[:chunk_size])
+
+
+def export(fields=None, short_description="", format="csv", compress=False, chunk_size=2000, filename=None, queryset=None, **kwargs):
+    """
+    A shortcut for streaming the queryset of a tool as a csv or json lines
+    file
+
+        class UserAdmin(CustomObjectToolModelAdminMixin, admin.ModelAdmin):
+            object_tools = ("export_csv", )
+
+            export_csv = object_tool.export(("name", "handsome"), "export")
+
+    Rows are read by `queryset.iterator(chunk_size)` and written to a
+    StreamingHttpResponse, gzipped on the fly if `compress` is set.
+    `queryset` is a callable takes the model admin and the request, the
+    filtered changelist queryset is used if omitted, or the current object
+    looked up in `get_queryset` in a change view.
+    """
+    def wrapper(modeladmin, request, obj=None):
+        try:
+            qs = _get_tool_queryset(modeladmin, request, obj, queryset)
+        except IncorrectLookupParameters:
+            return modeladmin.response_object_tool_incorrect_lookup(request)
+        from . import exports
+        return exports.stream_queryset(
+            qs, fields, format=format, compress=compress,
+            chunk_size=chunk_size, filename=filename)
+
+    kwargs.setdefault("__name__", "export")
+    kwargs["short_description"] = short_description or _("Export")
+    kwargs["allow_get"] = True
+    for key, value in kwargs.items():
+        if key in OBJECTTOOL_ALLOWED_PROPERTIES:
+            setattr(wrapper, key, value)
+
+    return wrapper
+
+
+def form(form_class, short_description="", template=None, confirm_field="confirm", importer=None, import_field="file", **kwargs):
     """
     A short cut for generate form view
 
@@ -48,10 +236,19 @@ def form(form_class, short_description="", template=None, confirm_field="confirm
             @form(Form, "text")
             def text(self, request, form, obj=None):
                 pass
+
+    When an `importer`, e.g. `object_tool.imports.CSVImporter`, is given,
+    the file uploaded by `import_field` is imported after the form is
+    validated, and the tool receives the result
+
+            @form(ImportForm, "import", importer=CSVImporter())
+            def import_users(self, request, form, result, obj=None):
+                pass
     """
     return _confirm_view(
         form_class=form_class, short_description=short_description,
-        template=template, confirm_field=confirm_field, **kwargs)
+        template=template, confirm_field=confirm_field, importer=importer,
+        import_field=import_field, **kwargs)
 
 
 def confirm(text=None, short_description="", template=None, confirm_field="confirm", **kwargs):
@@ -68,25 +265,33 @@ def confirm(text=None, short_description="", template=None, confirm_field="confi
         template=template, confirm_field=confirm_field, **kwargs)
 
 
-def _confirm_view(form_class=None, short_description="", template=None, confirm_text="", confirm_field="confirm", **kwargs):
+def _confirm_view(form_class=None, short_description="", template=None, confirm_text="", confirm_field="confirm", importer=None, import_field="file", **kwargs):
     def decorator(func):
         name = kwargs.pop("__name__", None) or func.__name__
         title = short_description or name
 
-        @wraps(func)
-        def wrapper(modeladmin, request, obj=None):
-            form = None
-
+        def bind(modeladmin, request):
+            """
+            returns whether the tool is confirmed, the bound form and the
+            arguments passing to the tool
+            """
             if request.method == "POST" and request.POST.get(confirm_field):
                 form = form_class and form_class(request.POST, request.FILES)
-                if not form or form.is_valid():
-                    return func(modeladmin, request, form, obj) if form\
-                        else func(modeladmin, request, obj)
+                if not form:
+                    return True, form, ()
+                if form.is_valid():
+                    if not importer:
+                        return True, form, (form, )
+                    result = importer.run(
+                        modeladmin, request, form.cleaned_data[import_field])
+                    return True, form, (form, result)
             else:
                 form = form_class and form_class()
+            return False, form, ()
 
+        def render(modeladmin, request, form, obj=None):
             context = dict(
-                modeladmin.admin_site.each_context(request),
+                modeladmin.get_object_tool_context(request),
                 action=name,
                 opts=modeladmin.model._meta,
                 confirm_text=confirm_text % dict(obj=obj or ""),
@@ -94,8 +299,7 @@ def _confirm_view(form_class=None, short_description="", template=None, confirm_
                 title=title,
                 obj=obj,
                 object_id=obj and obj.pk,
-                object_tool=object_tool_context(
-                    func, name, title)
+                object_tool=ToolSpec.from_tool(wrapper)
             )
 
             template_ = template or\
@@ -104,11 +308,42 @@ def _confirm_view(form_class=None, short_description="", template=None, confirm_
 
             return TemplateResponse(request, template_, context)
 
+        def confirmation(modeladmin, request, obj=None):
+            """
+            returns the confirm page if the request isn't confirmed, used to
+            confirm in the request before running the tool elsewhere
+            """
+            confirmed, form, args = bind(modeladmin, request)
+            if not confirmed:
+                return render(modeladmin, request, form, obj)
+            return None
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(modeladmin, request, obj=None):
+                confirmed, form, args = await sync_to_async(bind)(
+                    modeladmin, request)
+                if confirmed:
+                    return await func(modeladmin, request, *args, obj)
+                return await sync_to_async(render)(
+                    modeladmin, request, form, obj)
+        else:
+            @wraps(func)
+            def wrapper(modeladmin, request, obj=None):
+                confirmed, form, args = bind(modeladmin, request)
+                if confirmed:
+                    return func(modeladmin, request, *args, obj)
+                return render(modeladmin, request, form, obj)
+
         kwargs["short_description"] = title
         kwargs["allow_get"] = True
+        wrapper.confirm_field = confirm_field
+        wrapper.object_tool_confirmation = confirmation
+        wrapper.object_tool_importer = importer
         for key, value in kwargs.items():
             if key in OBJECTTOOL_ALLOWED_PROPERTIES:
                 setattr(wrapper, key, value)
+        wrapper.__name__ = name
 
         return wrapper
 
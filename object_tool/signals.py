@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.dispatch import Signal
+
+
+pre_object_tool = Signal()
+"""
+Sent before an object tool is executed, the sender is the model, with the
+arguments modeladmin, request, tool (the name of the tool) and obj
+"""
+
+post_object_tool = Signal()
+"""
+Sent after an object tool is executed, with the arguments of
+`pre_object_tool` and metrics, an `object_tool.metrics.ToolMetrics`
+"""
@@ -1,15 +1,53 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-from collections import defaultdict
+from collections import namedtuple, OrderedDict
+import threading
 
 from django.conf import settings
 from django.contrib import admin
 from django.contrib.admin.sites import AdminSite
 
+from .utils import ToolSpec
+
 
 __all__ = (
-    "CustomObjectToolAdminSite", "CustomObjectToolAdminSiteMixin", "site")
+    "CustomObjectToolAdminSite", "CustomObjectToolAdminSiteMixin",
+    "ObjectToolRegistry", "site")
+
+
+class ObjectToolRegistry(namedtuple(
+        "ObjectToolRegistry",
+        ("version", "enabled", "tools", "index"))):
+    """
+    An immutable snapshot of the tools registered to an admin site.
+
+    version: increased by every change of the registry
+    enabled: a mapping of view to the enabled (name, func) pairs of the view
+    tools: a mapping of view to the enabled (name, func) pairs available in
+        the view, including the tools of all views
+    index: a mapping of name to all registered tools
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, version=0, enabled=None, index=None):
+        enabled = {
+            view: tuple(tools.items())
+            for view, tools in (enabled or {}).items()
+        }
+        base_tools = enabled.get("", ())
+        tools = {
+            view: base_tools + view_tools if view else view_tools
+            for view, view_tools in enabled.items()
+        }
+        return cls(version, enabled, tools, dict(index or {}))
+
+    def get_tools(self, view=""):
+        try:
+            return self.tools[view]
+        except KeyError:
+            return self.tools.get("", ())
 
 
 class CustomObjectToolAdminSiteMixin(object):
@@ -20,41 +58,80 @@ class CustomObjectToolAdminSiteMixin(object):
 
     def __init__(self, *args, **kwargs):
         super(CustomObjectToolAdminSiteMixin, self).__init__(*args, **kwargs)
-        self._object_tools = defaultdict(dict)
-        self._global_object_tools = defaultdict(dict)
+        self._object_tool_lock = threading.Lock()
+        self._object_tool_registry = ObjectToolRegistry.create()
+
+    @property
+    def object_tool_registry(self):
+        """The current snapshot of registered tools"""
+        return self._object_tool_registry
+
+    @property
+    def object_tool_version(self):
+        """
+        A counter increased whenever the registered tools change, model
+        admins use it to invalidate their compiled tools.
+        """
+        return self._object_tool_registry.version
+
+    def _update_object_tools(self, update):
+        """
+        Publish a new registry snapshot, `update` receives mutable copies of
+        the enabled tools and the tool index
+        """
+        with self._object_tool_lock:
+            registry = self._object_tool_registry
+            enabled = {
+                view: OrderedDict(tools)
+                for view, tools in registry.enabled.items()
+            }
+            index = dict(registry.index)
+            update(enabled, index)
+            self._object_tool_registry = ObjectToolRegistry.create(
+                registry.version + 1, enabled, index)
 
     def add_object_tool(self, tool, view="", name=None):
         """
         Register an tool to be available globally.
         """
         name = name or tool.__name__
-        self._object_tools[view][name] = tool
-        self._global_object_tools[view][name] = tool
+
+        def update(enabled, index):
+            enabled.setdefault(view, OrderedDict())[name] = tool
+            index[name] = tool
+
+        self._update_object_tools(update)
 
     def disable_object_tool(self, name, view=""):
         """
         Disable a globally-registered tool. Raise KeyError for invalid names.
         """
-        del self._object_tools[view][name]
+        def update(enabled, index):
+            del enabled.get(view, {})[name]
+
+        self._update_object_tools(update)
 
     def get_object_tool(self, name):
         """
         Explicitly get a registered global tool whether it's enabled or
         not. Raise KeyError for invalid names.
         """
-        all_tools = {}
-        for tools in self._global_object_tools.values():
-            all_tools.update(tools)
-        return all_tools[name]
+        return self._object_tool_registry.index[name]
+
+    def get_object_tool_spec(self, name):
+        """
+        Get the ToolSpec of a registered global tool. Raise KeyError for
+        invalid names.
+        """
+        tool = self.get_object_tool(name)
+        return ToolSpec.from_tool(tool, name, getattr(
+            tool, "short_description", name.replace("_", " ")))
 
     def get_object_tools(self, view=""):
         """
         Get all the enabled tools as an iterable of (name, func).
         """
-        rv = list(self._object_tools[""].items())
-        if view:
-            rv.extend(self._object_tools[view].items())
-        return rv
+        return self._object_tool_registry.get_tools(view)
 
 
 class CustomObjectToolAdminSite(CustomObjectToolAdminSiteMixin, AdminSite):
@@ -4,15 +4,62 @@ from __future__ import unicode_literals
 import os
 
 from django.template.loaders.filesystem import Loader as FilesystemLoader
-try:
-    from functools import lru_cache
-except ImportError:
-    from django.utils.lru_cache import lru_cache
+
+
+TEMPLATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+LOADER = "object_tool.template.loaders.Loader"
+
+CACHED_LOADER = "django.template.loaders.cached.Loader"
+
+TEMPLATES = (
+    "admin/object_tool/baseview.html",
+    "admin/object_tool/breadcrumbs.html",
+    "admin/object_tool/form.html",
+    "admin/object_tool/object-tools-items.html",
+)
+"""templates used on every object tool page, precompiled by `warm_up`"""
 
 
 class Loader(FilesystemLoader):
-    @lru_cache(maxsize=None)
+    """loads templates of object tool"""
+
     def get_dirs(self):
-        from .. import BASE_DIR
-        template_dir = os.path.join(BASE_DIR, "templates")
-        return (template_dir, )
+        return (TEMPLATE_DIR, )
+
+
+def _loader_name(loader):
+    return loader[0] if isinstance(loader, (list, tuple)) else loader
+
+
+def install(engine):
+    """
+    Install the object tool loader to an engine behind a cached loader. It
+    joins the cached loader of the engine if the engine has one, otherwise
+    it is wrapped by a cached loader of its own.
+    """
+    loaders = list(engine.loaders)
+    for loader in loaders:
+        if _loader_name(loader) == LOADER:
+            return
+        if _loader_name(loader) == CACHED_LOADER and LOADER in loader[1]:
+            return
+
+    for i, loader in enumerate(loaders):
+        if _loader_name(loader) == CACHED_LOADER:
+            loaders[i] = (CACHED_LOADER, list(loader[1]) + [LOADER])
+            break
+    else:
+        loaders.append((CACHED_LOADER, [LOADER]))
+    engine.loaders = loaders
+    # the loaders are instantiated by a cached property
+    engine.__dict__.pop("template_loaders", None)
+
+
+def warm_up(get_template=None):
+    """compile the templates of object tool into the cached loaders"""
+    if get_template is None:
+        from django.template.loader import get_template
+    for name in TEMPLATES:
+        get_template(name)
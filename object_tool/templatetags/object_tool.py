@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django import template
+from django.conf import settings
+
+from ..cache import render_toolbar
+from ..renderers import render_object_tools_items, reverse_object_tool_url
+
+register = template.Library()
+
+register.simple_tag(
+    reverse_object_tool_url, takes_context=True, name="object_tool_url")
+
+
+@register.simple_tag(takes_context=True)
+def object_tools_items(context):
+    """
+    Render the items of the object-tools bar, the fragment is cached when
+    OBJECT_TOOL_TOOLBARCACHE is enabled
+    """
+    renderer = getattr(settings, "OBJECT_TOOL_TOOLBARRENDERER", "template")
+    if renderer == "python":
+        render = render_object_tools_items
+    else:
+        render = context.template.engine.get_template(
+            "admin/object_tool/object-tools-items.html").render
+    return render_toolbar(context, render)
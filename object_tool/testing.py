@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from .budgets import (
+    assert_max_queries, CapturedQueries, enforce_tool_budgets,
+    QueryBudgetExceeded)
+
+
+__all__ = (
+    "assert_max_queries", "CapturedQueries", "enforce_tool_budgets",
+    "QueryBudgetExceeded", "QueryBudgetTestMixin")
+
+
+class QueryBudgetTestMixin(object):
+    """
+    A TestCase mixin asserts the queries of object tool views, the sql
+    executed is reported when a budget is exceeded
+
+        class UserAdminTestCase(QueryBudgetTestMixin, TestCase):
+            def test_changelist(self):
+                with self.assertMaxQueries(5):
+                    self.client.get("/admin/auth/user/")
+
+            def test_tool(self):
+                with self.assertToolBudgets():
+                    self.client.post("/admin/auth/user/objecttool/tool/")
+    """
+
+    def assertMaxQueries(self, max_queries, using=None):
+        return assert_max_queries(max_queries, "Block", using)
+
+    def assertToolBudgets(self):
+        """enforce the `max_queries` of object tools"""
+        return enforce_tool_budgets()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from asgiref.sync import sync_to_async
+from django import forms
+from django.contrib import messages
+from django.contrib.auth.models import Group, User
+from django.http import HttpResponse
+
+from .. import shortcuts
+from ..admin import CustomObjectToolModelAdmin
+from ..imports import CSVImporter
+from ..sites import CustomObjectToolAdminSite
+
+
+site = CustomObjectToolAdminSite(name="testadmin")
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField()
+
+
+class UserAdmin(CustomObjectToolModelAdmin):
+    object_tools = (
+        "forkme", "deactivate", "confirm_action", "capitalize", "export_csv")
+    change_object_tools = ("rebuild", "confirm_rebuild")
+
+    list_filter = ("is_staff", )
+    search_fields = ("username", )
+
+    forkme = shortcuts.link(
+        "https://github.com/Xavier-Lam/django-object-tool",
+        "Fork me", classes="viewsitelink", target="_blank")
+
+    export_csv = shortcuts.export(("username", "is_staff"), "export")
+
+    @shortcuts.confirm("are you sure to edit %(obj)s??", "confirm-tool")
+    def confirm_action(self, request, obj=None):
+        messages.success(request, "confirmed")
+
+    def deactivate(self, request, obj=None):
+        if obj:
+            obj.is_active = False
+            obj.save()
+        else:
+            self.get_queryset(request).update(is_active=False)
+    deactivate.help_text = "deactivate users"
+    deactivate.fetch = dict(only=("is_active", ))
+
+    @shortcuts.batch("capitalize", chunk_size=2, fields=("first_name", ))
+    def capitalize(self, request, chunk):
+        for user in chunk:
+            user.first_name = user.username.capitalize()
+        return chunk
+
+    @shortcuts.background
+    def rebuild(self, request, obj=None):
+        request.object_tool_job.set_progress(1, 2)
+        if obj.first_name == "fail":
+            raise ValueError("failed")
+        messages.success(request, "rebuilt %s" % obj)
+
+    @shortcuts.background
+    @shortcuts.confirm("rebuild %(obj)s?", "confirm rebuild")
+    def confirm_rebuild(self, request, obj=None):
+        messages.success(request, "confirmed rebuilt %s" % obj)
+
+
+class GroupAdmin(CustomObjectToolModelAdmin):
+    object_tool_async = True
+    object_tools = ("rename", "touch", "confirm_rename")
+    changelist_object_tools = ("import_groups", "report")
+    change_object_tools = ("lock_rename", )
+
+    async def rename(self, request, obj=None):
+        obj.name = "renamed"
+        await sync_to_async(obj.save)()
+
+    def touch(self, request, obj=None):
+        messages.info(request, "touched %s" % obj)
+    touch.fetch = False
+
+    def lock_rename(self, request, obj=None):
+        obj.name = "locked"
+        obj.save()
+    lock_rename.fetch = dict(only=("name", ), select_for_update=True)
+
+    @shortcuts.confirm("rename %(obj)s?")
+    async def confirm_rename(self, request, obj=None):
+        return await self.rename(request, obj)
+
+    @shortcuts.form(
+        ImportForm, "import", importer=CSVImporter(
+            fields=("name", ), key_field="name", batch_size=2))
+    def import_groups(self, request, form, result, obj=None):
+        messages.info(request, "%d created, %d updated, %d errors" % (
+            result.created, result.updated, len(result.errors)))
+
+    async def report(self, request, obj=None):
+        count = await sync_to_async(Group.objects.count)()
+        return HttpResponse("%d groups" % count)
+    report.allow_get = True
+    report.cache_result = 60
+    report.cache_vary = ("q", )
+
+
+site.register(User, UserAdmin)
+site.register(Group, GroupAdmin)
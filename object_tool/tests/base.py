@@ -1,5 +1,17 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
 
 class ObjectToolTestCase(TestCase):
     pass
+
+
+class ObjectToolAdminTestCase(ObjectToolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(
+            "admin", "admin@example.com", "password")
+        cls.user = User.objects.create_user("user", "user@example.com")
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
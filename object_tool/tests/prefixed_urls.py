@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.urls import include, re_path as url
+
+urlpatterns = [
+    url(r'^prefix/', include("object_tool.tests.urls"))
+]
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import RequestFactory
+
+from .. import shortcuts
+from ..admin import CustomObjectToolModelAdmin
+from ..sites import CustomObjectToolAdminSite
+from .admin import site
+from .base import ObjectToolAdminTestCase, ObjectToolTestCase
+
+
+def make_tool(funcname):
+    def func(modeladmin, request, obj=None):
+        pass
+    func.__name__ = str(funcname)
+    return func
+
+
+class ModelAdminTestCase(ObjectToolTestCase):
+    def test_compiled_tools(self):
+        site = CustomObjectToolAdminSite()
+        site.add_object_tool(make_tool("global_tool"))
+
+        class UserAdmin(CustomObjectToolModelAdmin):
+            object_tools = ("tool", )
+            changelist_object_tools = ("changelist_tool", )
+
+            tool = make_tool("tool")
+            changelist_tool = make_tool("changelist_tool")
+
+        modeladmin = UserAdmin(User, site)
+        tools = modeladmin._get_compiled_object_tools("changelist")
+        self.assertEqual(
+            ["global_tool", "tool", "changelist_tool"],
+            [name for _, name, _ in tools])
+        self.assertIs(tools, modeladmin._get_compiled_object_tools("changelist"))
+        self.assertEqual(
+            ["global_tool", "tool"],
+            [name for _, name, _ in modeladmin._get_compiled_object_tools("change")])
+
+        # rebuilt after the site registry changed
+        site.add_object_tool(make_tool("changelist_global_tool"), "changelist")
+        tools = modeladmin._get_compiled_object_tools("changelist")
+        self.assertEqual(
+            ["global_tool", "changelist_global_tool", "tool", "changelist_tool"],
+            [name for _, name, _ in tools])
+
+        # rebuilt after the tool attributes changed
+        UserAdmin.tool2 = make_tool("tool2")
+        UserAdmin.object_tools = ("tool", "tool2")
+        self.assertEqual(
+            ["global_tool", "tool", "tool2"],
+            [name for _, name, _ in modeladmin._get_compiled_object_tools("change")])
+        self.assertIn("tool2", modeladmin._get_object_tool_specs("change"))
+
+    def test_attributes_set_after_decoration(self):
+        site = CustomObjectToolAdminSite()
+        global_tool = make_tool("global_tool")
+        site.add_object_tool(global_tool)
+        global_tool.classes = "deletelink"
+
+        class UserAdmin(CustomObjectToolModelAdmin):
+            object_tools = ("confirmed", )
+
+            @shortcuts.confirm("sure?", "confirmed")
+            def confirmed(self, request, obj=None):
+                pass
+            confirmed.classes = "addlink"
+            confirmed.help_text = "help"
+
+        specs = UserAdmin(User, site)._get_object_tool_specs("changelist")
+        self.assertEqual("addlink", specs["confirmed"].classes)
+        self.assertEqual("help", specs["confirmed"].help_text)
+        self.assertEqual("confirmed", specs["confirmed"].short_description)
+        self.assertEqual("deletelink", specs["global_tool"].classes)
+
+    def test_request_memoization(self):
+        checked = []
+
+        class UserAdmin(CustomObjectToolModelAdmin):
+            object_tools = ("tool", "tool2", "tool3")
+
+            tool = make_tool("tool")
+            tool.allowed_permissions = ("change", )
+            tool2 = make_tool("tool2")
+            tool2.allowed_permissions = ("delete", "change")
+            tool3 = make_tool("tool3")
+            tool3.allowed_permissions = ("delete", )
+
+            def has_change_permission(self, request, obj=None):
+                checked.append("change")
+                return True
+
+            def has_delete_permission(self, request, obj=None):
+                checked.append("delete")
+                return False
+
+        modeladmin = UserAdmin(User, CustomObjectToolAdminSite())
+        request = RequestFactory().get("/admin/auth/user/")
+        tools = modeladmin.get_object_tools(request)
+        self.assertEqual(["tool", "tool2"], list(tools))
+        self.assertEqual(["change", "delete"], checked)
+        self.assertIs(tools, modeladmin.get_object_tools(request))
+        self.assertEqual(["change", "delete"], checked)
+
+
+class ObjectToolViewTestCase(ObjectToolAdminTestCase):
+    def test_changelist_view(self):
+        resp = self.client.get("/testadmin/auth/user/")
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(
+            ["forkme", "deactivate", "confirm_action", "capitalize",
+             "export_csv"],
+            [spec.name for spec in resp.context["object_tools"]])
+        self.assertContains(resp, 'title="deactivate users"')
+        self.assertContains(
+            resp, 'href="https://github.com/Xavier-Lam/django-object-tool"')
+        self.assertContains(resp, "/testadmin/auth/user/objecttool/deactivate/")
+
+    def test_overridden_object_tools(self):
+        modeladmin = site._registry[User]
+        get_object_tools = modeladmin.get_object_tools
+
+        def extra_tools(request, view=None):
+            rv = get_object_tools(request, view)
+            rv["extra"] = (make_tool("extra"), "extra", "extra tool")
+            return rv
+
+        with mock.patch.object(modeladmin, "get_object_tools", extra_tools):
+            resp = self.client.get("/testadmin/auth/user/")
+        self.assertEqual(200, resp.status_code)
+        spec = resp.context["object_tools"][-1]
+        self.assertEqual("extra", spec.name)
+        self.assertEqual("extra tool", spec.short_description)
+
+    def test_change_view(self):
+        url = "/testadmin/auth/user/%s/change/" % self.user.pk
+        resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+        self.assertContains(
+            resp, "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk)
+
+    def test_object_tool_view(self):
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk
+        self.assertEqual(405, self.client.get(url).status_code)
+        resp = self.client.post(url)
+        self.assertRedirects(
+            resp, "/testadmin/auth/user/%s/change/" % self.user.pk)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+        resp = self.client.post("/testadmin/auth/user/objecttool/missing/")
+        self.assertEqual(403, resp.status_code)
+
+    def test_fetch_hints(self):
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk
+        with connection.execute_wrapper(capture):
+            self.client.post(url)
+        # only the requested fields are fetched besides the request user
+        selects = [sql for sql in queries
+                   if sql.startswith("SELECT") and '"auth_user"' in sql
+                   and '"auth_user"."username"' not in sql]
+        self.assertEqual(1, len(selects))
+        self.assertIn('"auth_user"."is_active"', selects[0])
+        self.assertNotIn("JOIN", selects[0])
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+        modeladmin = site._registry[User]
+        self.assertIsNone(modeladmin.get_object_tool_object(
+            None, modeladmin.deactivate, "0"))
+        self.assertIsNone(modeladmin.get_object_tool_object(
+            None, modeladmin.deactivate, "invalid"))
+
+        # True fetches with no hints
+        with mock.patch.object(type(modeladmin).deactivate, "fetch", True):
+            obj = modeladmin.get_object_tool_object(
+                None, modeladmin.deactivate, str(self.user.pk))
+        self.assertEqual(self.user, obj)
+        self.assertEqual(set(), obj.get_deferred_fields())
+        with mock.patch.object(type(modeladmin).deactivate, "fetch", "invalid"):
+            self.assertRaises(
+                ValueError, modeladmin.get_object_tool_object,
+                None, modeladmin.deactivate, str(self.user.pk))
+
+        # the rows are restricted by get_queryset unless opted out
+        restricted = User.objects.exclude(pk=self.user.pk)
+        with mock.patch.object(
+                modeladmin, "get_queryset", return_value=restricted):
+            self.assertIsNone(modeladmin.get_object_tool_object(
+                None, modeladmin.deactivate, str(self.user.pk)))
+            with mock.patch.object(
+                    modeladmin, "objecttool_unrestricted_fetch", True):
+                self.assertEqual(self.user, modeladmin.get_object_tool_object(
+                    None, modeladmin.deactivate, str(self.user.pk)))
+
+    def test_confirm_view(self):
+        url = "/testadmin/auth/user/objecttool/confirm_action/"
+        resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual("confirm_action", resp.context["object_tool"].name)
+        self.assertContains(resp, "confirm-tool")
+        resp = self.client.post(url, dict(confirm="yes"))
+        self.assertRedirects(resp, "/testadmin/auth/user/")
+
+    def test_lean_context(self):
+        url = "/testadmin/auth/user/objecttool/confirm_action/"
+        with mock.patch.object(site, "each_context") as each_context:
+            resp = self.client.get(url)
+        self.assertFalse(each_context.called)
+        self.assertEqual([], resp.context["available_apps"])
+        self.assertTrue(resp.context["has_permission"])
+        self.assertEqual(site.site_header, resp.context["site_header"])
+
+        modeladmin = site._registry[User]
+        with mock.patch.object(modeladmin, "objecttool_lean_context", False):
+            resp = self.client.get(url)
+        self.assertTrue(resp.context["available_apps"])
+
+    def test_views_skip_url_resolution(self):
+        with mock.patch("object_tool.admin.resolve") as resolve:
+            self.client.get("/testadmin/auth/user/")
+            self.client.get("/testadmin/auth/user/%s/change/" % self.user.pk)
+            self.client.post(
+                "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk)
+        self.assertFalse(resolve.called)
+
+
+class AsyncObjectToolViewTestCase(ObjectToolAdminTestCase):
+    def setUp(self):
+        super(AsyncObjectToolViewTestCase, self).setUp()
+        self.async_client.force_login(self.superuser)
+
+    @classmethod
+    def setUpTestData(cls):
+        super(AsyncObjectToolViewTestCase, cls).setUpTestData()
+        cls.group = Group.objects.create(name="group")
+
+    async def test_async_tool(self):
+        url = "/testadmin/auth/group/%s/objecttool/rename/" % self.group.pk
+        resp = await self.async_client.post(url)
+        self.assertEqual(302, resp.status_code)
+        self.assertEqual(
+            "/testadmin/auth/group/%s/change/" % self.group.pk, resp.url)
+        group = await sync_to_async(Group.objects.get)(pk=self.group.pk)
+        self.assertEqual("renamed", group.name)
+
+        resp = await self.async_client.get(url)
+        self.assertEqual(405, resp.status_code)
+
+    async def test_sync_tool(self):
+        url = "/testadmin/auth/group/%s/objecttool/touch/" % self.group.pk
+        resp = await self.async_client.post(url)
+        self.assertEqual(302, resp.status_code)
+
+    async def test_pk_only_tool(self):
+        modeladmin = site._registry[Group]
+        obj = await sync_to_async(modeladmin.get_object_tool_object)(
+            None, modeladmin.touch, str(self.group.pk))
+        self.assertEqual(self.group.pk, obj.pk)
+        self.assertEqual({"name"}, obj.get_deferred_fields())
+        self.assertIsNone(await sync_to_async(modeladmin.get_object_tool_object)(
+            None, modeladmin.touch, "0"))
+
+    async def test_select_for_update_tool(self):
+        url = "/testadmin/auth/group/%s/objecttool/lock_rename/" % \
+            self.group.pk
+        resp = await self.async_client.post(url)
+        self.assertEqual(302, resp.status_code)
+        group = await sync_to_async(Group.objects.get)(pk=self.group.pk)
+        self.assertEqual("locked", group.name)
+
+    async def test_async_confirm(self):
+        url = "/testadmin/auth/group/%s/objecttool/confirm_rename/" % \
+            self.group.pk
+        resp = await self.async_client.get(url)
+        self.assertEqual(200, resp.status_code)
+        self.assertContains(resp, "rename group?")
+        resp = await self.async_client.post(url, dict(confirm="yes"))
+        self.assertEqual(302, resp.status_code)
+        group = await sync_to_async(Group.objects.get)(pk=self.group.pk)
+        self.assertEqual("renamed", group.name)
+
+    def test_sync_client(self):
+        url = "/testadmin/auth/group/%s/objecttool/rename/" % self.group.pk
+        self.assertEqual(302, self.client.post(url).status_code)
+        self.group.refresh_from_db()
+        self.assertEqual("renamed", self.group.name)
+
+    def test_unauthenticated(self):
+        self.client.logout()
+        url = "/testadmin/auth/group/%s/objecttool/touch/" % self.group.pk
+        resp = self.client.post(url)
+        self.assertEqual(302, resp.status_code)
+        self.assertIn("/testadmin/login/", resp.url)
+
+
+class ObjectToolQuerySetTestCase(ObjectToolAdminTestCase):
+    def test_object_tool_queryset(self):
+        User.objects.create_user("another", is_staff=True)
+        request = RequestFactory().post(
+            "/testadmin/auth/user/objecttool/deactivate/",
+            dict(_changelist_filters="q=user"))
+        request.user = self.superuser
+        modeladmin = site._registry[User]
+        with self.assertNumQueries(0):
+            qs = modeladmin.get_object_tool_queryset(request)
+        self.assertIs(qs, modeladmin.get_object_tool_queryset(request))
+        self.assertEqual(["user"], [user.username for user in qs])
+
+        request = RequestFactory().get(
+            "/testadmin/auth/user/objecttool/deactivate/",
+            dict(_changelist_filters="is_staff__exact=1&o=-1"))
+        request.user = self.superuser
+        self.assertEqual(
+            ["another", "admin"],
+            [user.username for user in modeladmin.get_object_tool_queryset(request)])
+
+    def test_batch_filtered(self):
+        self.client.post(
+            "/testadmin/auth/user/objecttool/capitalize/?_changelist_filters=q%3Duser")
+        self.assertEqual(
+            ["", "User"],
+            list(User.objects.order_by("pk").values_list(
+                "first_name", flat=True)))
+
+        # the changelist filters are ignored in a change view
+        self.client.post(
+            "/testadmin/auth/user/%s/objecttool/capitalize/?_changelist_filters=q%%3Duser"
+            % self.superuser.pk)
+        self.assertEqual(
+            ["Admin", "User"],
+            list(User.objects.order_by("pk").values_list(
+                "first_name", flat=True)))
+
+    def test_incorrect_lookup_parameters(self):
+        for url in ("/testadmin/auth/user/objecttool/capitalize/",
+                    "/testadmin/auth/user/objecttool/export_csv/"):
+            resp = self.client.post(
+                url + "?_changelist_filters=nonexistent%3D1", follow=True)
+            self.assertRedirects(resp, "/testadmin/auth/user/")
+            self.assertEqual(
+                ["The changelist filters of the tool are invalid."],
+                [str(m) for m in resp.context["messages"]])
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.test import Client, override_settings
+
+from ..testing import (
+    assert_max_queries, QueryBudgetExceeded, QueryBudgetTestMixin)
+from .admin import GroupAdmin, UserAdmin
+from .base import ObjectToolAdminTestCase
+
+
+class QueryBudgetTestCase(QueryBudgetTestMixin, ObjectToolAdminTestCase):
+    def test_assert_max_queries(self):
+        with self.assertMaxQueries(1) as captured:
+            User.objects.count()
+        self.assertEqual(1, len(captured))
+
+        with self.assertRaises(QueryBudgetExceeded) as context:
+            with assert_max_queries(1, "counting"):
+                User.objects.count()
+                User.objects.filter(is_staff=True).count()
+        message = str(context.exception)
+        self.assertIn("counting executed 2 queries, the budget is 1", message)
+        self.assertIn('"auth_user"."is_staff"', message)
+
+    def test_tool_budget(self):
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk
+        with mock.patch.object(UserAdmin.deactivate, "max_queries", 1,
+                               create=True):
+            with self.assertToolBudgets():
+                self.client.post(url)
+            self.user.refresh_from_db()
+            self.assertFalse(self.user.is_active)
+
+        with mock.patch.object(UserAdmin.deactivate, "max_queries", 0,
+                               create=True):
+            # not enforced
+            self.client.post(url)
+            with self.assertToolBudgets():
+                self.assertRaises(
+                    QueryBudgetExceeded, self.client.post, url)
+
+    def test_dispatched_name(self):
+        # labeled by the name the tool is dispatched under, not the name
+        # of a shared wrapper
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk
+        self.addCleanup(setattr, UserAdmin.deactivate, "__name__",
+                        UserAdmin.deactivate.__name__)
+        UserAdmin.deactivate.__name__ = "wrapper"
+        with mock.patch.object(UserAdmin.deactivate, "max_queries", 0,
+                               create=True):
+            with self.assertToolBudgets():
+                with self.assertRaises(QueryBudgetExceeded) as context:
+                    self.client.post(url)
+        self.assertIn("Object tool deactivate executed",
+                      str(context.exception))
+
+    async def test_async_tool_budget(self):
+        group = await sync_to_async(Group.objects.create)(name="group")
+        await sync_to_async(self.async_client.force_login)(self.superuser)
+        url = "/testadmin/auth/group/%s/objecttool/rename/" % group.pk
+        with mock.patch.object(GroupAdmin.rename, "max_queries", 0,
+                               create=True):
+            with self.assertToolBudgets():
+                with self.assertRaises(QueryBudgetExceeded) as context:
+                    await self.async_client.post(url)
+        self.assertIn("Object tool rename executed 1 queries",
+                      str(context.exception))
+
+    def test_middleware(self):
+        middleware = settings.MIDDLEWARE + [
+            "object_tool.middleware.QueryBudgetMiddleware"]
+        url = "/testadmin/auth/user/"
+        with override_settings(
+                DEBUG=True, MIDDLEWARE=middleware,
+                OBJECT_TOOL_QUERYBUDGETS=dict(changelist=1)):
+            client = Client()
+            client.force_login(self.superuser)
+            with self.assertRaises(QueryBudgetExceeded) as context:
+                client.get(url)
+            self.assertIn("changelist view", str(context.exception))
+
+            with mock.patch.object(
+                    UserAdmin, "object_tool_query_budgets",
+                    dict(changelist=100)):
+                self.assertEqual(200, client.get(url).status_code)
+
+        # only works in debug mode
+        with override_settings(
+                MIDDLEWARE=middleware,
+                OBJECT_TOOL_QUERYBUDGETS=dict(changelist=1)):
+            client = Client()
+            client.force_login(self.superuser)
+            self.assertEqual(200, client.get(url).status_code)
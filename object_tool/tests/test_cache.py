@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.template.base import Template
+from django.test import override_settings
+
+from ..cache import get_cache
+from .base import ObjectToolAdminTestCase
+
+
+@override_settings(OBJECT_TOOL_TOOLBARCACHE=True)
+class ToolbarCacheTestCase(ObjectToolAdminTestCase):
+    def setUp(self):
+        super(ToolbarCacheTestCase, self).setUp()
+        get_cache().clear()
+
+    def get_toolbar(self, url):
+        resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+        content = resp.content.decode("utf-8")
+        start = content.index('<ul class="object-tools">')
+        toolbar = content[start:content.index("</ul>", start)]
+        # csrf tokens are masked differently on every request
+        return re.sub(
+            r'name="csrfmiddlewaretoken" value="\w+"',
+            'name="csrfmiddlewaretoken"', toolbar)
+
+    def test_toolbar_cache(self):
+        with override_settings(OBJECT_TOOL_TOOLBARCACHE=False):
+            uncached = self.get_toolbar("/testadmin/auth/user/")
+        self.assertEqual(uncached, self.get_toolbar("/testadmin/auth/user/"))
+
+        render = Template.render
+        with mock.patch.object(
+                Template, "render", autospec=True,
+                side_effect=render) as mocked:
+            self.assertEqual(
+                uncached, self.get_toolbar("/testadmin/auth/user/"))
+        names = [call[0][0].name for call in mocked.call_args_list]
+        self.assertNotIn("admin/object_tool/object-tools-items.html", names)
+
+    def test_object_id(self):
+        another = User.objects.create_user("another")
+        url = "/testadmin/auth/user/%s/change/"
+        self.get_toolbar(url % self.user.pk)
+        toolbar = self.get_toolbar(url % another.pk)
+        self.assertIn(
+            "/testadmin/auth/user/%s/objecttool/deactivate/" % another.pk,
+            toolbar)
+        self.assertNotIn("__objecttool_", toolbar)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.test import override_settings
+
+from .. import shortcuts
+from ..imports import CSVImporter
+from ..jobs import Job
+from .admin import ImportForm
+from .base import ObjectToolAdminTestCase
+
+
+@override_settings(OBJECT_TOOL_BACKGROUNDEXECUTOR="sync")
+class BackgroundToolTestCase(ObjectToolAdminTestCase):
+    def run_tool(self):
+        url = "/testadmin/auth/user/%s/objecttool/rebuild/" % self.user.pk
+        resp = self.client.post(url)
+        self.assertEqual(302, resp.status_code)
+        self.assertRegex(
+            resp.url, r"^/testadmin/auth/user/objecttool/jobs/[0-9a-f]+/$")
+        return resp.url, Job.get(resp.url.rstrip("/").rsplit("/", 1)[-1])
+
+    def test_background(self):
+        url, job = self.run_tool()
+        self.assertEqual(Job.SUCCESS, job.state)
+        self.assertEqual((1, 2), (job.done, job.total))
+        self.assertEqual([("success", "rebuilt user")], job.messages)
+        self.assertEqual(self.superuser.pk, job.user_id)
+
+        resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+        self.assertContains(resp, "rebuilt user")
+        self.assertNotContains(resp, 'http-equiv="refresh"')
+
+        self.client.force_login(self.user)
+        self.assertEqual(302, self.client.get(url).status_code)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(403, self.client.get(url).status_code)
+
+        resp = self.client.get("/testadmin/auth/group/objecttool/jobs/%s/" % job.id)
+        self.assertEqual(404, resp.status_code)
+
+    def test_failure(self):
+        self.user.first_name = "fail"
+        self.user.save()
+        url, job = self.run_tool()
+        self.assertEqual(Job.FAILURE, job.state)
+        self.assertEqual("ValueError: failed", job.error)
+        self.assertContains(self.client.get(url), "ValueError: failed")
+
+        # the traceback is only kept in debug mode
+        with override_settings(DEBUG=True):
+            url, job = self.run_tool()
+        self.assertIn("Traceback", job.error)
+        self.assertIn("ValueError: failed", job.error)
+
+    def test_confirm(self):
+        url = "/testadmin/auth/user/%s/objecttool/confirm_rebuild/" % \
+            self.user.pk
+        resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+        self.assertContains(resp, "rebuild user?")
+        resp = self.client.post(url)
+        self.assertEqual(200, resp.status_code)
+
+        resp = self.client.post(url, dict(confirm="yes"))
+        self.assertRegex(
+            resp.url, r"^/testadmin/auth/user/objecttool/jobs/[0-9a-f]+/$")
+        job = Job.get(resp.url.rstrip("/").rsplit("/", 1)[-1])
+        self.assertEqual(Job.SUCCESS, job.state)
+        self.assertEqual([("success", "confirmed rebuilt user")], job.messages)
+
+    def test_importer(self):
+        with self.assertRaises(ValueError):
+            shortcuts.background(shortcuts.form(
+                ImportForm, importer=CSVImporter(fields=("username", )))(
+                    lambda modeladmin, request, form, result, obj=None: None))
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from django.template.backends.django import get_installed_libraries
+from django.template.engine import Engine
+
+from ..template import loaders
+from .base import ObjectToolTestCase
+
+
+class LoaderTestCase(ObjectToolTestCase):
+    def test_install(self):
+        engine = Engine(loaders=[
+            "django.template.loaders.app_directories.Loader"])
+        loaders.install(engine)
+        loaders.install(engine)
+        self.assertEqual([
+            "django.template.loaders.app_directories.Loader",
+            (loaders.CACHED_LOADER, [loaders.LOADER])
+        ], engine.loaders)
+
+        engine = Engine(loaders=[(loaders.CACHED_LOADER, [
+            "django.template.loaders.app_directories.Loader"])])
+        engine.template_loaders
+        loaders.install(engine)
+        loaders.install(engine)
+        self.assertEqual([(loaders.CACHED_LOADER, [
+            "django.template.loaders.app_directories.Loader", loaders.LOADER
+        ])], engine.loaders)
+        # the loaders are reloaded
+        self.assertEqual(
+            2, len(engine.template_loaders[0].loaders))
+
+    def test_templates_parsed_once(self):
+        engine = Engine(libraries=get_installed_libraries())
+        loaders.install(engine)
+        with mock.patch.object(
+                loaders.Loader, "get_contents",
+                autospec=True,
+                side_effect=loaders.Loader.get_contents) as get_contents:
+            loaders.warm_up(engine.get_template)
+            self.assertEqual(len(loaders.TEMPLATES), get_contents.call_count)
+            for _ in range(3):
+                for name in loaders.TEMPLATES:
+                    engine.get_template(name)
+            self.assertEqual(len(loaders.TEMPLATES), get_contents.call_count)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group, User
+from django.db import NotSupportedError
+from django.http import HttpResponse, HttpResponseRedirect
+
+from ..locks import DatabaseLockBackend, ToolLock
+from .admin import GroupAdmin, site, UserAdmin
+from .base import ObjectToolAdminTestCase
+
+
+class ToolLockTestCase(ObjectToolAdminTestCase):
+    def setUp(self):
+        super(ToolLockTestCase, self).setUp()
+        self.url = "/testadmin/auth/user/%s/objecttool/deactivate/" % \
+            self.user.pk
+        self.modeladmin = site._registry[User]
+
+    def patch_tool(self, **kwargs):
+        patchers = [
+            mock.patch.object(UserAdmin.deactivate, key, value, create=True)
+            for key, value in dict(lock=True, **kwargs).items()]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        lock = ToolLock.for_tool(
+            self.modeladmin, UserAdmin.deactivate, self.user)
+        lock.interval = 0.01
+        return lock
+
+    def test_unlocked(self):
+        self.assertIsNone(ToolLock.for_tool(
+            self.modeladmin, UserAdmin.deactivate, self.user))
+
+    def test_dispatched_name(self):
+        # tools built by the same shortcut share a function name, they are
+        # locked by the names they are dispatched under
+        with mock.patch.object(UserAdmin.export_csv, "lock", True,
+                               create=True):
+            running = ToolLock.for_tool(
+                self.modeladmin, UserAdmin.export_csv, None, "export_csv")
+            other = ToolLock.for_tool(
+                self.modeladmin, UserAdmin.export_csv, None, "export_json")
+            self.assertNotEqual(running.key, other.key)
+
+            self.assertTrue(running.acquire())
+            self.addCleanup(running.release)
+            resp = self.client.get(
+                "/testadmin/auth/user/objecttool/export_csv/", follow=True)
+        self.assertContains(resp, "Export is running, please try again later")
+
+    def test_reject(self):
+        running = self.patch_tool()
+        self.assertTrue(running.acquire())
+        resp = self.client.post(self.url, follow=True)
+        self.assertContains(resp, "is running, please try again later")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+        # other objects are not locked
+        another = User.objects.create_user("another")
+        self.client.post(
+            "/testadmin/auth/user/%s/objecttool/deactivate/" % another.pk)
+        another.refresh_from_db()
+        self.assertFalse(another.is_active)
+
+        running.release()
+        self.client.post(self.url)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_wait(self):
+        running = self.patch_tool(lock_policy="wait", lock_timeout=0.05)
+        self.assertTrue(running.acquire())
+        with mock.patch.object(ToolLock, "interval", 0.01), \
+                mock.patch.object(
+                    running.backend, "acquire", return_value=False):
+            resp = self.client.post(self.url, follow=True)
+        self.assertContains(resp, "is running, please try again later")
+
+        # acquired after the running execution released
+        def release(seconds):
+            running.token and running.release()
+        with mock.patch("object_tool.locks.time.sleep", release):
+            self.client.post(self.url)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_coalesce(self):
+        running = self.patch_tool(lock_policy="coalesce", lock_timeout=1)
+        self.assertTrue(running.acquire())
+        running.finish(HttpResponseRedirect("/done/"))
+        running.release()
+        with mock.patch.object(running.backend, "acquire", side_effect=[
+                False, False]):
+            resp = self.client.post(self.url)
+        self.assertEqual("/done/", resp.url)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+        # rendered pages of another user are not shared
+        self.assertTrue(running.acquire())
+        running.finish(HttpResponse("private page"))
+        running.release()
+        with mock.patch.object(running.backend, "acquire", side_effect=[
+                False, False]):
+            resp = self.client.post(self.url, follow=True)
+        self.assertNotContains(resp, "private page")
+        self.assertContains(resp, "was completed by another request")
+
+    async def test_async_reject(self):
+        group = await sync_to_async(Group.objects.create)(name="group")
+        await sync_to_async(self.async_client.force_login)(self.superuser)
+        with mock.patch.object(GroupAdmin.rename, "lock", True, create=True):
+            running = ToolLock.for_tool(
+                site._registry[Group], GroupAdmin.rename, group)
+            self.assertTrue(await sync_to_async(running.acquire)())
+            resp = await self.async_client.post(
+                "/testadmin/auth/group/%s/objecttool/rename/" % group.pk)
+            await sync_to_async(running.release)()
+        self.assertEqual(302, resp.status_code)
+        await sync_to_async(group.refresh_from_db)()
+        self.assertEqual("group", group.name)
+
+    def test_database_backend(self):
+        backend = DatabaseLockBackend()
+        self.assertRaises(
+            NotSupportedError, backend.acquire, "object_tool.lock.0", "", 1)
+        self.assertEqual(
+            -2 ** 63, backend._int_key("object_tool.lock." + "0" * 32))
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.test import override_settings
+from six import StringIO
+
+from .. import metrics
+from ..metrics import aggregator, percentile
+from ..signals import post_object_tool, pre_object_tool
+from .base import ObjectToolAdminTestCase
+
+
+class MetricsTestCase(ObjectToolAdminTestCase):
+    def setUp(self):
+        super(MetricsTestCase, self).setUp()
+        self.addCleanup(aggregator.reset)
+
+    def test_signals(self):
+        received = []
+
+        def receiver(signal, **kwargs):
+            received.append((signal, kwargs))
+
+        pre_object_tool.connect(receiver, sender=User)
+        post_object_tool.connect(receiver, sender=User)
+        self.addCleanup(pre_object_tool.disconnect, receiver, sender=User)
+        self.addCleanup(post_object_tool.disconnect, receiver, sender=User)
+
+        self.client.post(
+            "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk)
+        self.assertEqual(
+            [pre_object_tool, post_object_tool],
+            [signal for signal, _ in received])
+        self.assertEqual("deactivate", received[0][1]["tool"])
+        self.assertEqual(self.user.pk, received[0][1]["obj"].pk)
+
+        metrics = received[1][1]["metrics"]
+        self.assertEqual("deactivate", metrics.tool)
+        self.assertEqual("auth.user", metrics.model)
+        self.assertEqual("change", metrics.view)
+        self.assertEqual("HttpResponseRedirect", metrics.response_type)
+        self.assertEqual(1, metrics.queries)
+        self.assertEqual(1, metrics.rows)
+        self.assertIsNone(metrics.exception)
+        self.assertGreaterEqual(metrics.wall_time, 0)
+
+    async def test_async_tool(self):
+        received = []
+
+        def receiver(signal, metrics, **kwargs):
+            received.append(metrics)
+
+        post_object_tool.connect(receiver, sender=Group)
+        self.addCleanup(post_object_tool.disconnect, receiver, sender=Group)
+
+        group = await sync_to_async(Group.objects.create)(name="group")
+        await sync_to_async(self.async_client.force_login)(self.superuser)
+        await self.async_client.post(
+            "/testadmin/auth/group/%s/objecttool/rename/" % group.pk)
+        # the queries run by sync_to_async in the async tool are counted
+        self.assertEqual(1, len(received))
+        self.assertEqual("rename", received[0].tool)
+        self.assertEqual(1, received[0].queries)
+        self.assertEqual(1, received[0].rows)
+
+    def test_dispatched_name(self):
+        received = []
+
+        def receiver(signal, metrics, **kwargs):
+            received.append(metrics)
+
+        post_object_tool.connect(receiver, sender=User)
+        self.addCleanup(post_object_tool.disconnect, receiver, sender=User)
+        self.client.get("/testadmin/auth/user/objecttool/export_csv/")
+        self.assertEqual(["export_csv"], [m.tool for m in received])
+
+    def test_failing_hook(self):
+        def hook(metrics):
+            raise ValueError("broken hook")
+
+        def receiver(**kwargs):
+            raise ValueError("broken receiver")
+
+        post_object_tool.connect(receiver, sender=User)
+        self.addCleanup(post_object_tool.disconnect, receiver, sender=User)
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk
+        with override_settings(OBJECT_TOOL_METRICS=[hook]), \
+                mock.patch.object(metrics, "logger") as logger:
+            resp = self.client.post(url)
+        self.assertEqual(302, resp.status_code)
+        self.assertTrue(logger.exception.called)
+        self.assertTrue(logger.error.called)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_aggregator(self):
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk
+        with override_settings(
+                OBJECT_TOOL_METRICS=["object_tool.metrics.aggregator"]):
+            for _ in range(3):
+                self.client.post(url)
+        self.client.post(url)
+
+        stats = aggregator.stats()
+        self.assertEqual(1, len(stats))
+        self.assertEqual("deactivate", stats[0]["tool"])
+        self.assertEqual(3, stats[0]["count"])
+        self.assertEqual(1, stats[0]["queries_p99"])
+
+        out = StringIO()
+        call_command("object_tool_metrics", "--json", "--reset", stdout=out)
+        self.assertEqual(stats, json.loads(out.getvalue()))
+        self.assertEqual([], aggregator.stats())
+
+        # only the latest samples are kept
+        with override_settings(
+                OBJECT_TOOL_METRICS=["object_tool.metrics.aggregator"],
+                OBJECT_TOOL_METRICSSAMPLES=2):
+            for _ in range(3):
+                self.client.post(url)
+            self.assertEqual(2, aggregator.stats()[0]["count"])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(95, percentile(values, 95))
+        self.assertEqual(99, percentile(values, 99))
+        self.assertIsNone(percentile([], 50))
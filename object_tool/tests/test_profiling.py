@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+from .base import ObjectToolAdminTestCase
+
+
+class ProfileTestCase(ObjectToolAdminTestCase):
+    def setUp(self):
+        super(ProfileTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_profile(self):
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" \
+            "?_objecttool_profile=tottime" % self.user.pk
+        with override_settings(
+                OBJECT_TOOL_PROFILE=True,
+                OBJECT_TOOL_PROFILEDIR=self.directory):
+            resp = self.client.post(url)
+        self.assertEqual(200, resp.status_code)
+        self.assertTemplateUsed(resp, "admin/object_tool/profile.html")
+        self.assertEqual(
+            "HttpResponseRedirect", resp.context["response_type"])
+        self.assertTrue(any(
+            query["sql"].startswith("UPDATE")
+            for query in resp.context["queries"]))
+        self.assertIn("tottime", resp.context["stats"])
+        files = os.listdir(self.directory)
+        self.assertEqual(1, len(files))
+        self.assertTrue(files[0].startswith("auth.user.deactivate."))
+
+    def test_dispatched_name(self):
+        url = "/testadmin/auth/user/objecttool/export_csv/" \
+            "?_objecttool_profile"
+        with override_settings(
+                OBJECT_TOOL_PROFILE=True,
+                OBJECT_TOOL_PROFILEDIR=self.directory):
+            resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual("export_csv", resp.context["object_tool"].name)
+        files = os.listdir(self.directory)
+        self.assertTrue(files[0].startswith("auth.user.export_csv."))
+
+    def test_not_profiled(self):
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" \
+            "?_objecttool_profile" % self.user.pk
+        # disabled by settings
+        self.assertEqual(302, self.client.post(url).status_code)
+
+        # not a superuser
+        self.client.force_login(self.user)
+        with override_settings(
+                OBJECT_TOOL_PROFILE=True,
+                OBJECT_TOOL_PROFILEDIR=self.directory):
+            resp = self.client.post(url)
+        self.assertNotEqual(200, resp.status_code)
+        self.assertEqual([], os.listdir(self.directory))
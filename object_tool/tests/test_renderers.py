@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.template import engines, RequestContext
+from django.test import RequestFactory
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext_lazy as _
+
+from ..renderers import render_object_tools_items
+from ..utils import ToolSpec
+from .base import ObjectToolTestCase
+
+
+class RendererTestCase(ObjectToolTestCase):
+    tools = (
+        ToolSpec(
+            "link", "Fork <me>", "https://example.com/?a=1&b=2", "_blank",
+            "viewsitelink", "help \"text\"", True),
+        ToolSpec("plain_link", _("Home"), "/", None, None, None, True),
+        ToolSpec("post", "100% <done>", None, None, None, None, False),
+        ToolSpec(
+            "get", mark_safe("<b>get</b>"), None, None, "addlink",
+            "get's help", True),
+    )
+
+    def assertParity(self, **context):
+        request = RequestFactory().get("/testadmin/auth/user/")
+        request.current_app = "testadmin"
+        context = RequestContext(request, dict(dict(
+            opts=User._meta,
+            object_tools=self.tools,
+            object_id=None,
+            preserved_filters="",
+            is_popup=False,
+            to_field=None,
+            changelist_filters="",
+            csrf_token="token"
+        ), **context))
+        template = engines["django"].engine.get_template(
+            "admin/object_tool/object-tools-items.html")
+        with context.bind_template(template):
+            expected = template.render(context)
+            self.assertEqual(expected, render_object_tools_items(context))
+        return expected
+
+    def test_parity(self):
+        rv = self.assertParity()
+        self.assertIn("/testadmin/auth/user/objecttool/post/", rv)
+        self.assertParity(object_tools=())
+        rv = self.assertParity(object_id="1_5F2 & 3")
+        self.assertIn("/testadmin/auth/user/1_5F2%20&amp;%203/", rv)
+        self.assertParity(
+            preserved_filters="_changelist_filters=q%3Dsome%26o%3D1",
+            changelist_filters="q=some&o=1")
+        self.assertParity(is_popup=True, to_field="id")
+        rv = self.assertParity(object_tools_disabled=frozenset(["get"]))
+        self.assertIn('title="get&#x27;s help" disabled>', rv)
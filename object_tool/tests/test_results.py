@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group, User
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import RequestFactory
+
+from ..cache import get_cache
+from ..results import invalidate_results, ResultCache
+from .admin import GroupAdmin, site
+from .base import ObjectToolAdminTestCase
+
+
+class ResultCacheTestCase(ObjectToolAdminTestCase):
+    url = "/testadmin/auth/group/objecttool/report/"
+
+    def setUp(self):
+        super(ResultCacheTestCase, self).setUp()
+        self.addCleanup(get_cache().clear)
+        self.modeladmin = site._registry[Group]
+
+    async def test_cached(self):
+        await sync_to_async(self.async_client.force_login)(self.superuser)
+        await sync_to_async(Group.objects.create)(name="first")
+        resp = await self.async_client.get(self.url)
+        self.assertEqual(b"1 groups", resp.content)
+
+        # invalidated by saving
+        await sync_to_async(Group.objects.create)(name="second")
+        resp = await self.async_client.get(self.url)
+        self.assertEqual(b"2 groups", resp.content)
+
+        # served from the cache
+        await sync_to_async(Group.objects.bulk_create)([
+            Group(name="third")])
+        resp = await self.async_client.get(self.url)
+        self.assertEqual(b"2 groups", resp.content)
+        resp = await self.async_client.get(self.url, dict(q="other"))
+        self.assertEqual(b"3 groups", resp.content)
+        resp = await self.async_client.get(self.url, dict(ignored="1"))
+        self.assertEqual(b"2 groups", resp.content)
+
+        await sync_to_async(invalidate_results)(Group)
+        resp = await self.async_client.get(self.url)
+        self.assertEqual(b"3 groups", resp.content)
+
+    def test_key(self):
+        factory = RequestFactory()
+
+        def make_key(user, **params):
+            request = factory.get(self.url, params)
+            request.user = user
+            return ResultCache.for_tool(
+                self.modeladmin, request, GroupAdmin.report).key
+
+        self.assertEqual(
+            make_key(self.superuser), make_key(self.superuser, page="1"))
+        self.assertNotEqual(
+            make_key(self.superuser), make_key(self.superuser, q="1"))
+        self.assertNotEqual(make_key(self.superuser), make_key(self.user))
+        self.assertIsNone(ResultCache.for_tool(
+            self.modeladmin, factory.get(self.url), GroupAdmin.touch))
+
+        # keyed by the name the tool is dispatched under
+        request = factory.get(self.url)
+        request.user = self.superuser
+        self.assertNotEqual(
+            ResultCache.for_tool(
+                self.modeladmin, request, GroupAdmin.report).key,
+            ResultCache.for_tool(
+                self.modeladmin, request, GroupAdmin.report, None,
+                "other_report").key)
+
+    def test_template_response(self):
+        other = User.objects.create_superuser(
+            "other", "other@example.com", "password")
+        template = engines["django"].from_string("{{ request.user }}")
+        csrf_template = engines["django"].from_string("{% csrf_token %}")
+
+        def respond(user, template=template):
+            request = RequestFactory().get(self.url)
+            request.user = user
+            results = ResultCache.for_tool(
+                self.modeladmin, request, GroupAdmin.report)
+            rv = results.get()
+            if rv is None:
+                rv = results.set(TemplateResponse(request, template))
+            return results, rv
+
+        results, resp = respond(self.superuser)
+        self.assertEqual(b"admin", resp.content)
+        self.assertEqual(b"admin", results.get().content)
+        # users with the same permissions don't share rendered pages
+        results, resp = respond(other)
+        self.assertEqual(b"other", resp.content)
+        self.assertEqual(b"admin", respond(self.superuser)[1].content)
+
+        # pages with csrf tokens are not cached
+        get_cache().clear()
+        request = RequestFactory().get(self.url)
+        request.user = self.superuser
+        results = ResultCache.for_tool(
+            self.modeladmin, request, GroupAdmin.report)
+        results.set(TemplateResponse(request, csrf_template))
+        self.assertIsNone(results.get())
+        self.assertTrue(request.META["CSRF_COOKIE_NEEDS_UPDATE"])
+
+    def test_sync(self):
+        request = RequestFactory().get(self.url)
+        request.user = self.superuser
+        resp = self.modeladmin.response_object_tool(
+            request, GroupAdmin.report)
+        self.assertEqual(b"0 groups", resp.content)
+        Group.objects.bulk_create([Group(name="group")])
+        resp = self.modeladmin.response_object_tool(
+            request, GroupAdmin.report)
+        self.assertEqual(b"0 groups", resp.content)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import gzip
+import json
+
+from django.contrib.auth.models import Group, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+
+from ..exports import stream_queryset
+from ..imports import CSVImporter, ImportResult
+from ..shortcuts import read_chunk
+from .admin import site
+from .base import ObjectToolAdminTestCase
+
+
+class BatchTestCase(ObjectToolAdminTestCase):
+    def test_read_chunk(self):
+        for i in range(3):
+            User.objects.create_user("batch%d" % i)
+        qs = User.objects.all()
+        pks = sorted(qs.values_list("pk", flat=True))
+        chunk = read_chunk(qs, 2)
+        self.assertEqual(pks[:2], [user.pk for user in chunk])
+        chunk = read_chunk(qs, 2, chunk[-1].pk)
+        self.assertEqual(pks[2:4], [user.pk for user in chunk])
+        self.assertEqual(
+            pks[4:], [user.pk for user in read_chunk(qs, 2, chunk[-1].pk)])
+        self.assertEqual([], read_chunk(qs, 2, pks[-1]))
+
+    def test_batch(self):
+        User.objects.create_user("another")
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            resp = self.client.post(
+                "/testadmin/auth/user/objecttool/capitalize/")
+        self.assertRedirects(resp, "/testadmin/auth/user/")
+        self.assertEqual(
+            ["Admin", "User", "Another"],
+            list(User.objects.order_by("pk").values_list(
+                "first_name", flat=True)))
+        self.assertEqual(
+            2, sum(sql.endswith("LIMIT 2") for sql in queries))
+        # every chunk is read in the transaction it is processed in
+        for i, sql in enumerate(queries):
+            if sql.endswith("LIMIT 2"):
+                self.assertTrue(queries[i - 1].startswith("SAVEPOINT"))
+
+        self.client.post(
+            "/testadmin/auth/user/%s/objecttool/capitalize/" % self.user.pk)
+
+
+class ExportTestCase(ObjectToolAdminTestCase):
+    def test_export(self):
+        resp = self.client.get(
+            "/testadmin/auth/user/objecttool/export_csv/?_changelist_filters=q%3Duser")
+        self.assertTrue(resp.streaming)
+        self.assertEqual("text/csv", resp["Content-Type"])
+        self.assertEqual(
+            'attachment; filename="user.csv"', resp["Content-Disposition"])
+        self.assertEqual(
+            b"username,is_staff\r\nuser,False\r\n",
+            b"".join(resp.streaming_content))
+
+    def test_stream_queryset(self):
+        qs = User.objects.order_by("pk")
+        resp = stream_queryset(
+            qs, ("username", "date_joined"), format="jsonl", chunk_size=1)
+        lines = b"".join(resp.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(
+            ["admin", "user"],
+            [json.loads(line)["username"] for line in lines])
+        self.assertEqual(
+            self.user.date_joined.isoformat()[:19],
+            json.loads(lines[1])["date_joined"][:19])
+
+        resp = stream_queryset(qs, ("username", ), compress=True, chunk_size=1)
+        self.assertEqual("application/gzip", resp["Content-Type"])
+        self.assertEqual(
+            b"username\r\nadmin\r\nuser\r\n",
+            gzip.decompress(b"".join(resp.streaming_content)))
+
+
+class ImportTestCase(ObjectToolAdminTestCase):
+    def test_import(self):
+        Group.objects.create(name="existed")
+        content = "\ufeffname\nexisted\nnew1\n\nnew2\n,\nnew3\n"
+        url = "/testadmin/auth/group/objecttool/import_groups/"
+        resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+
+        resp = self.client.post(url, dict(
+            confirm="yes", file=SimpleUploadedFile(
+                "groups.csv", content.encode("utf-8"))), follow=True)
+        self.assertContains(resp, "3 created, 1 updated, 1 errors")
+        self.assertEqual(
+            ["existed", "new1", "new2", "new3"],
+            list(Group.objects.order_by("name").values_list(
+                "name", flat=True)))
+
+    def test_import_invalid_key(self):
+        importer = CSVImporter(fields=("username", ), key_field="id")
+        form_class = importer.get_row_form(site._registry[User], ["username"])
+        result = ImportResult()
+        importer.import_batch(
+            form_class, [(2, dict(id="invalid", username="new"))], result)
+        self.assertEqual(1, len(result.errors))
+        self.assertEqual(2, result.errors[0][0])
+        self.assertIn("id", result.errors[0][1])
+        self.assertEqual(0, result.created)
+        self.assertFalse(User.objects.filter(username="new").exists())
+
+    def test_import_errors(self):
+        content = "name\nfirst\nfirst\nsecond\n"
+        url = "/testadmin/auth/group/objecttool/import_groups/"
+        resp = self.client.post(url, dict(
+            confirm="yes", file=SimpleUploadedFile(
+                "groups.csv", content.encode("utf-8"))), follow=True)
+        # the failed batch is reported and the import goes on
+        self.assertContains(resp, "1 created, 0 updated, 2 errors")
+        self.assertEqual(
+            ["second"], list(Group.objects.values_list("name", flat=True)))
@@ -75,3 +75,24 @@ class SiteTestCase(ObjectToolTestCase):
         self.assertIs(site.get_object_tool("changelist_tool_alias"), changelist_tool2)
         self.assertIs(site.get_object_tool("changeform_tool"), changeform_tool)
         self.assertIs(site.get_object_tool("changeform_tool_alias"), changeform_tool2)
+
+    def test_registry_snapshot(self):
+        def global_tool():
+            pass
+
+        site = CustomObjectToolAdminSite()
+        registry = site.object_tool_registry
+        site.add_object_tool(global_tool)
+        self.assertEqual(registry.version + 1, site.object_tool_version)
+        self.assertEqual((), registry.get_tools())
+        self.assertEqual(
+            (("global_tool", global_tool), ),
+            site.object_tool_registry.get_tools("changelist"))
+
+        registry = site.object_tool_registry
+        self.assertRaises(KeyError, site.disable_object_tool, "missing")
+        self.assertIs(registry, site.object_tool_registry)
+        site.disable_object_tool("global_tool")
+        self.assertEqual(registry.version + 1, site.object_tool_version)
+        self.assertEqual((), site.get_object_tools())
+        self.assertIs(global_tool, site.get_object_tool("global_tool"))
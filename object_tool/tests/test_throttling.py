@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+
+from .. import shortcuts
+from ..cache import get_cache
+from ..throttling import parse_rate, Throttle
+from .admin import site, UserAdmin
+from .base import ObjectToolAdminTestCase
+
+
+class ThrottleTestCase(ObjectToolAdminTestCase):
+    def setUp(self):
+        super(ThrottleTestCase, self).setUp()
+        self.addCleanup(get_cache().clear)
+
+    def patch_tool(self, func, **kwargs):
+        for key, value in kwargs.items():
+            patcher = mock.patch.object(func, key, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_parse_rate(self):
+        self.assertEqual((5, 3600), parse_rate("5/hour"))
+        self.assertEqual((1, 30), parse_rate("1/30s"))
+        self.assertEqual((100, 86400), parse_rate("100/day"))
+        self.assertRaises(ValueError, parse_rate, "5/fortnight")
+
+    def test_throttle(self):
+        self.patch_tool(UserAdmin.deactivate, throttle="2/hour")
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk
+        change_url = "/testadmin/auth/user/%s/change/" % self.user.pk
+        for _ in range(2):
+            self.assertEqual(302, self.client.post(url).status_code)
+        resp = self.client.get(change_url)
+        self.assertIn("deactivate", resp.context["object_tools_disabled"])
+        self.assertContains(resp, 'title="deactivate users" disabled>')
+
+        resp = self.client.post(url)
+        self.assertEqual(429, resp.status_code)
+        self.assertLessEqual(int(resp["Retry-After"]), 3601)
+        self.assertContains(
+            resp, "Deactivate is throttled, please try again in",
+            status_code=429)
+
+        # per user
+        another = User.objects.create_superuser(
+            "another", "another@example.com", "password")
+        self.client.force_login(another)
+        self.assertEqual(302, self.client.post(url).status_code)
+        resp = self.client.get(change_url)
+        self.assertFalse(resp.context["object_tools_disabled"])
+
+    def test_dispatched_name(self):
+        # tools built by the same shortcut share a function name, they are
+        # throttled by the names they are dispatched under
+        export_json = shortcuts.export(format="json", throttle="1/hour")
+        self.assertEqual("export", export_json.__name__)
+        modeladmin = site._registry[User]
+        request = mock.Mock(user=self.superuser)
+        self.assertNotEqual(
+            Throttle.for_tool(
+                modeladmin, request, export_json, "export_json").key,
+            Throttle.for_tool(
+                modeladmin, request, export_json, "export_csv").key)
+
+        self.patch_tool(UserAdmin.export_csv, throttle="1/hour")
+        url = "/testadmin/auth/user/objecttool/export_csv/"
+        self.assertEqual(200, self.client.get(url).status_code)
+        resp = self.client.get("/testadmin/auth/user/")
+        self.assertEqual(
+            {"export_csv"}, resp.context["object_tools_disabled"])
+        self.assertEqual(429, self.client.get(url).status_code)
+        self.assertFalse(Throttle.for_tool(
+            modeladmin, request, UserAdmin.export_csv, "export_json").wait())
+
+    def test_global_throttle(self):
+        self.patch_tool(
+            UserAdmin.deactivate, throttle="1/day", throttle_scope="global")
+        url = "/testadmin/auth/user/%s/objecttool/deactivate/" % self.user.pk
+        self.assertEqual(302, self.client.post(url).status_code)
+        another = User.objects.create_superuser(
+            "another", "another@example.com", "password")
+        self.client.force_login(another)
+        self.assertEqual(429, self.client.post(url).status_code)
+
+    def test_confirm_page_not_counted(self):
+        self.patch_tool(UserAdmin.confirm_action, throttle="1/hour")
+        url = "/testadmin/auth/user/objecttool/confirm_action/"
+        for _ in range(2):
+            self.assertEqual(200, self.client.get(url).status_code)
+        self.assertEqual(
+            302, self.client.post(url, dict(confirm="yes")).status_code)
+        self.assertEqual(429, self.client.get(url).status_code)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import clear_url_caches, reverse
+from django.utils import translation
+
+import object_tool
+from ..admin import CustomObjectToolModelAdminMixin
+from ..shortcuts import link
+from .. import utils
+from ..utils import cached_reverse
+from .base import ObjectToolTestCase
+
+
+class URLCacheTestCase(ObjectToolTestCase):
+    def test_cached_reverse(self):
+        viewname = "admin:auth_user_objecttool"
+        for object_id in ("1", "a_5Fb c", "中文/&?"):
+            kwargs = dict(action_name="tool", object_id=object_id)
+            self.assertEqual(
+                reverse(viewname, current_app="testadmin", kwargs=kwargs),
+                cached_reverse(
+                    viewname, current_app="testadmin",
+                    kwargs=dict(action_name="tool"), object_id=object_id))
+        self.assertEqual(
+            "/testadmin/auth/user/1/change/",
+            cached_reverse(
+                "admin:auth_user_change", current_app="testadmin",
+                object_id=1))
+        self.assertEqual(
+            "/testadmin/auth/user/",
+            cached_reverse("admin:auth_user_changelist", "testadmin"))
+
+        with override_settings(ROOT_URLCONF="object_tool.tests.prefixed_urls"):
+            self.assertEqual(
+                "/prefix/testadmin/auth/user/",
+                cached_reverse("admin:auth_user_changelist", "testadmin"))
+
+    def test_cached_reverse_invalidation(self):
+        viewname = "admin:auth_user_changelist"
+        with mock.patch.object(
+                utils, "_reverse_template",
+                wraps=utils._reverse_template) as reverse_template:
+            cached_reverse(viewname, "testadmin")
+            cached_reverse(viewname, "testadmin")
+            self.assertEqual(1, reverse_template.call_count)
+
+            # i18n_patterns reverse differently per language
+            with translation.override("fr"):
+                cached_reverse(viewname, "testadmin")
+            self.assertEqual(2, reverse_template.call_count)
+
+            clear_url_caches()
+            self.assertEqual(
+                "/testadmin/auth/user/", cached_reverse(viewname, "testadmin"))
+            self.assertEqual(3, reverse_template.call_count)
+
+
+class LazyImportTestCase(ObjectToolTestCase):
+    def test_lazy_import(self):
+        code = "import sys, object_tool; " \
+            "print('django.contrib.admin' in sys.modules)"
+        output = subprocess.check_output(
+            [sys.executable, "-c", code], cwd=os.path.dirname(object_tool.BASE_DIR))
+        self.assertEqual(b"False", output.strip())
+
+        # jobs and exports are imported when a tool runs
+        code = "import sys, object_tool.shortcuts; " \
+            "print('object_tool.jobs' in sys.modules " \
+            "or 'object_tool.exports' in sys.modules)"
+        output = subprocess.check_output(
+            [sys.executable, "-c", code], cwd=os.path.dirname(object_tool.BASE_DIR),
+            env=dict(os.environ,
+                     DJANGO_SETTINGS_MODULE="object_tool.tests.settings"))
+        self.assertEqual(b"False", output.strip())
+
+    def test_star_import(self):
+        namespace = dict()
+        exec("from object_tool import *", namespace)
+        self.assertIs(link, namespace["link"])
+        self.assertIs(
+            CustomObjectToolModelAdminMixin,
+            namespace["ObjectToolModelAdminMixin"])
+        self.assertNotIn("import_module", namespace)
+
+    def test_attributes(self):
+        self.assertIs(
+            CustomObjectToolModelAdminMixin,
+            object_tool.CustomObjectToolModelAdminMixin)
+        self.assertIs(
+            CustomObjectToolModelAdminMixin,
+            object_tool.ObjectToolModelAdminMixin)
+        self.assertIs(link, object_tool.link)
+        self.assertIn("patch_admin", dir(object_tool))
+        self.assertRaises(AttributeError, getattr, object_tool, "missing")
@@ -4,6 +4,9 @@ from __future__ import unicode_literals
 from django.contrib import admin
 from django.urls import re_path as url
 
+from .admin import site
+
 urlpatterns = [
-    url(r'^admin/', admin.site.urls)
+    url(r'^admin/', admin.site.urls),
+    url(r'^testadmin/', site.urls)
 ]
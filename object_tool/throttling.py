@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import time
+
+from .cache import get_cache, make_key
+from .utils import get_tool_name
+
+
+__all__ = ("parse_rate", "Throttle")
+
+
+PERIODS = dict(
+    s=1, sec=1, second=1, m=60, min=60, minute=60, h=3600, hour=3600,
+    d=86400, day=86400)
+
+
+def parse_rate(rate):
+    """parse a rate like '5/hour' or '10/5m' into (requests, seconds)"""
+    num, _, period = rate.partition("/")
+    multiplier = period.lstrip("0123456789")
+    count = period[:len(period) - len(multiplier)]
+    try:
+        return int(num), int(count or 1) * PERIODS[multiplier.lower()]
+    except (KeyError, ValueError):
+        raise ValueError("Invalid throttle rate %r" % rate)
+
+
+class Throttle(object):
+    """
+    A fixed window rate limit of an object tool, counted in the object tool
+    cache. The tool declares it by attributes
+
+        throttle
+            the rate, e.g. '5/hour', '100/day' or '1/30s'
+        throttle_scope
+            'user' (default) to limit every user, or 'global' to limit all
+            users together
+    """
+
+    def __init__(self, key, rate):
+        self.key = key
+        self.num_requests, self.duration = parse_rate(rate)
+
+    @classmethod
+    def for_tool(cls, modeladmin, request, action, name=None):
+        """
+        the throttle of a tool dispatched as `name`, returns None if the
+        tool isn't throttled
+        """
+        rate = getattr(action, "throttle", None)
+        if not rate:
+            return None
+        scope = getattr(action, "throttle_scope", "user")
+        ident = None if scope == "global" else request.user.pk
+        key = make_key(
+            "throttle", modeladmin.admin_site.name,
+            modeladmin.model._meta.label_lower,
+            get_tool_name(action, name), scope, ident)
+        return cls(key, rate)
+
+    def _window(self):
+        now = time.time()
+        window = int(now // self.duration)
+        return "%s.%d" % (self.key, window), \
+            int((window + 1) * self.duration - now) + 1
+
+    def wait(self):
+        """
+        Seconds to wait until the tool can be executed again, None if it
+        isn't throttled
+        """
+        key, remaining = self._window()
+        if (get_cache().get(key) or 0) >= self.num_requests:
+            return remaining
+        return None
+
+    def consume(self):
+        """
+        Count an execution, returns the seconds to wait if it is throttled
+        otherwise None
+        """
+        cache = get_cache()
+        key, remaining = self._window()
+        cache.add(key, 0, remaining)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # expired between add and incr
+            cache.set(key, 1, remaining)
+            count = 1
+        if count > self.num_requests:
+            return remaining
+        return None
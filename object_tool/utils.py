@@ -1,16 +1,139 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+from collections import namedtuple
+from weakref import WeakKeyDictionary
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import (
+    get_resolver, get_script_prefix, get_urlconf, NoReverseMatch, reverse)
+from django.utils.encoding import iri_to_uri
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.text import capfirst
+from django.utils.translation import get_language
+from six.moves.urllib.parse import quote
+
+
 OBJECTTOOL_LINK_ALLOWED_PROPERTIES = ("href", "target")
 OBJECTTOOL_ALLOWED_PROPERTIES = OBJECTTOOL_LINK_ALLOWED_PROPERTIES + (
-    "__name__", "allow_get", "classes", "help_text", "short_description")
+    "__name__", "allow_get", "cache_invalidate", "cache_result",
+    "cache_vary", "classes", "fetch", "help_text", "lock",
+    "lock_policy", "lock_timeout", "max_queries", "profile",
+    "short_description", "throttle", "throttle_scope")
+
+
+class ToolSpec(namedtuple("ToolSpec", (
+        "name", "short_description", "href", "target", "classes",
+        "help_text", "allow_get"))):
+    """
+    The presentation of an object tool consumed by templates. It is built
+    from the attributes of the tool when the tools of a model admin are
+    compiled rather than on every render.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_tool(cls, func, name=None, short_description=None):
+        name = name or func.__name__
+        if short_description is None:
+            short_description = getattr(
+                func, "short_description", capfirst(name.replace("_", " ")))
+        return cls(
+            name=name,
+            short_description=short_description,
+            href=getattr(func, "href", None),
+            target=getattr(func, "target", None),
+            classes=getattr(func, "classes", None),
+            help_text=getattr(func, "help_text", None),
+            allow_get=getattr(func, "allow_get", False)
+        )
+
+
+def get_tool_spec(func, name, short_description):
+    """
+    Get the ToolSpec of a tool from its current attributes, attributes set
+    after the tool is decorated are included
+    """
+    return ToolSpec.from_tool(func, name, short_description)
+
+
+def get_tool_name(action, name=None):
+    """
+    The name of an object tool, the name it is dispatched under if given,
+    otherwise the name of its function
+    """
+    return name or getattr(action, "__name__", str(action))
+
+
+def request_cache(request, name):
+    """
+    Get a dictionary stored on the request by name, use it to memoize
+    values for the lifetime of the request
+    """
+    try:
+        caches = request._object_tool_cache
+    except AttributeError:
+        caches = request._object_tool_cache = {}
+    try:
+        return caches[name]
+    except KeyError:
+        rv = caches[name] = {}
+        return rv
+
+
+OBJECT_ID_PLACEHOLDER = "__objecttool_object_id__"
+
+# url templates of each resolver, dropped with the resolver when
+# clear_url_caches() is called
+_url_templates = WeakKeyDictionary()
+
+
+def cached_reverse(viewname, current_app=None, kwargs=None, object_id=None):
+    """
+    Reverse a url and cache it as a template for the current urlconf and
+    language, only `object_id` is filled in when the template is reused.
+    """
+    kwargs = kwargs or {}
+    resolver = get_resolver(get_urlconf())
+    key = (
+        get_script_prefix(), get_language(), viewname, current_app,
+        tuple(sorted(kwargs.items())), object_id is not None)
+    try:
+        templates = _url_templates[resolver]
+    except KeyError:
+        templates = _url_templates[resolver] = {}
+    try:
+        template = templates[key]
+    except KeyError:
+        template = templates[key] = _reverse_template(
+            viewname, current_app, kwargs, object_id is not None)
+    if object_id is None:
+        return template
+    return template.replace(OBJECT_ID_PLACEHOLDER, quote_object_id(object_id))
+
+
+def quote_object_id(object_id):
+    """quote an object id as django's url resolver does"""
+    return iri_to_uri(quote(str(object_id), safe=RFC3986_SUBDELIMS + "/~:@"))
+
+
+def _reverse_template(viewname, current_app, kwargs, with_object_id):
+    if not with_object_id:
+        return reverse(viewname, current_app=current_app, kwargs=kwargs)
+    try:
+        return reverse(
+            viewname, current_app=current_app,
+            kwargs=dict(kwargs, object_id=OBJECT_ID_PLACEHOLDER))
+    except NoReverseMatch:
+        if kwargs:
+            raise
+        return reverse(
+            viewname, current_app=current_app, args=(OBJECT_ID_PLACEHOLDER,))
 
 
-def object_tool_context(func, name, short_description):
-    context = {
-        property: getattr(func, property)
-        for property in dir(func)
-        if property in OBJECTTOOL_ALLOWED_PROPERTIES
-    }
-    context["short_description"] = short_description
-    return (name, context)
+@receiver(setting_changed)
+def clear_url_templates(setting=None, **kwargs):
+    """Clear the cached url templates after the urlconf reloaded"""
+    if setting is None or setting == "ROOT_URLCONF":
+        _url_templates.clear()
@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import django
+
+
+def measure(func, number, repeat, warmup):
+    """returns the seconds per call of each round"""
+    for _ in range(warmup):
+        func()
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    return rounds
+
+
+def compare(results, baseline, threshold):
+    """returns the cases slower than the baseline by more than threshold"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = result["median"] / base["median"]
+        if ratio > 1 + threshold:
+            regressions.append((name, base["median"], result["median"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the object tool request path")
+    parser.add_argument("-k", dest="pattern", help="only run cases contain it")
+    parser.add_argument("-n", "--number", type=int, default=20,
+                        help="calls per round")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="rounds")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write the results as json")
+    parser.add_argument("--compare", help="the json of a baseline run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="the allowed slowdown ratio to the baseline")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+    django.setup()
+
+    import object_tool
+    from benchmarks.cases import get_cases
+
+    results = {}
+    for name, func in get_cases().items():
+        if args.pattern and args.pattern not in name:
+            continue
+        rounds = measure(func, args.number, args.repeat, args.warmup)
+        results[name] = dict(
+            min=min(rounds), median=statistics.median(rounds), rounds=rounds)
+        sys.stderr.write("%-40s %10.1f us\n" % (
+            name, results[name]["median"] * 1e6))
+
+    # overhead of the mixin comparing with a plain ModelAdmin
+    for name, result in results.items():
+        view, _, variant = name.partition(".")
+        plain = results.get("%s.plain" % view)
+        if plain and variant != "plain":
+            result["overhead"] = result["median"] / plain["median"] - 1
+
+    report = dict(
+        meta=dict(
+            python=platform.python_version(),
+            django=django.get_version(),
+            object_tool=object_tool.__version__,
+            platform=platform.platform(),
+            time=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            number=args.number,
+            repeat=args.repeat),
+        results=results)
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            sys.stderr.write("REGRESSION %s: %.1f us -> %.1f us (x%.2f)\n" % (
+                name, before * 1e6, after * 1e6, ratio))
+        sys.exit(bool(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,8 @@ package = dict()
 with open(os.path.join("object_tool", "__init__.py"), "r") as f:
     lines = f.readlines()
     for line in lines:
-        match = re.match(r"(__\w+?__)\s*=\s*(.+)$", line)
+        # only the string metadata, e.g. __version__ = "0.0.1"
+        match = re.match(r"(__\w+?__)\s*=\s*([\"'].*)$", line)
         if match:
             package[match.group(1)] = eval(match.group(2))
 
@@ -27,7 +28,7 @@ setup(
     author=package["__author__"],
     author_email=package["__author_email__"],
     url=package["__url__"],
-    packages=find_packages(),
+    packages=find_packages(exclude=("benchmarks", "benchmarks.*")),
     keywords=["django", "object-tool", "object-tools", "administration"],
     description=package["__description__"],
     long_description=long_description,